@@ -1,85 +1,285 @@
 """The UniFi WAN Status integration."""
 from __future__ import annotations
 
+import asyncio
+from functools import partial
 import logging
 
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_PASSWORD, CONF_USERNAME, Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import ConfigEntryNotReady
-
+import voluptuous as vol
 
-from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_USERNAME, Platform
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.exceptions import ConfigEntryNotReady, ServiceValidationError
+from homeassistant.helpers import (
+    config_validation as cv,
+    device_registry as dr,
+    entity_registry as er,
+)
+from homeassistant.helpers.device_registry import DeviceEntryType, format_mac
+from homeassistant.helpers.typing import ConfigType
 
-from .const import CONF_CONTROLLER, CONF_SITE, CONF_VERIFY_SSL, DOMAIN
+from .const import (
+    ATTR_MAC,
+    CONF_CONTROLLER,
+    CONF_DEVICE_INTERVAL,
+    CONF_DISCOVERY_INTERVAL,
+    CONF_FAST_INTERVAL,
+    CONF_IMPORT_STATISTICS,
+    CONF_PUSH,
+    CONF_SITE,
+    CONF_SITES,
+    CONF_STABLE_INTERVAL,
+    CONF_STALE_GRACE,
+    CONF_UNIFI_OS,
+    DEFAULT_DEVICE_INTERVAL,
+    DEFAULT_DISCOVERY_INTERVAL,
+    DEFAULT_FAST_INTERVAL,
+    DEFAULT_IMPORT_STATISTICS,
+    DEFAULT_PUSH,
+    DEFAULT_SITE,
+    DEFAULT_STABLE_INTERVAL,
+    DEFAULT_STALE_GRACE,
+    DOMAIN,
+    SERVICE_REFRESH,
+)
+from .api import UniFiConnectionError
 from .coordinator import UniFiWANCoordinator
+from .hub import async_get_client_pool
+from .statistics import UniFiStatisticsImporter
+from .storage import (
+    UniFiSnapshotStore,
+    UniFiStatisticsStore,
+    async_get_session_store,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[Platform] = [Platform.SENSOR]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+REFRESH_SCHEMA = vol.Schema({vol.Optional(ATTR_MAC): vol.All(cv.string, format_mac)})
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Merge single-site entries of one account and set up the refresh service."""
+    await _async_merge_site_entries(hass)
+
+    async def async_handle_refresh(call: ServiceCall) -> None:
+        """Refresh every entry, or only the gateway with the given MAC.
+
+        Refreshes join a fetch that is already in flight, so bursts of
+        calls from automations do not multiply controller requests. Device
+        lists are fetched even if the health heartbeat shows no change.
+        """
+        coordinators: list[UniFiWANCoordinator] = list(
+            hass.data.get(DOMAIN, {}).values()
+        )
+        if (mac := call.data.get(ATTR_MAC)) is None:
+            await asyncio.gather(
+                *(coordinator.async_refresh_devices() for coordinator in coordinators)
+            )
+            return
+
+        for coordinator in coordinators:
+            if await coordinator.async_refresh_gateway(mac):
+                return
+        raise ServiceValidationError(f"No UniFi gateway with MAC {mac}")
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_REFRESH, async_handle_refresh, schema=REFRESH_SCHEMA
+    )
+    return True
+
+
+async def _async_merge_site_entries(hass: HomeAssistant) -> None:
+    """Fold the version 1 entries of each controller account into one entry.
+
+    Version 1 entries monitored one site each. Migrated one by one they
+    would keep a coordinator and poll loop per site, so before any entry is
+    set up, those sharing an account become a single entry covering all
+    their sites, polled in one fan-out. The account's existing version 2
+    entry is kept if there is one, otherwise the first version 1 entry,
+    with its options. WAN entities, gateways and sites move to it; the
+    other entries are removed with their controller device and entry-level
+    sensors.
+    """
+    accounts: dict[tuple[str, str], list[ConfigEntry]] = {}
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        account = (entry.data[CONF_CONTROLLER].rstrip("/"), entry.data[CONF_USERNAME])
+        accounts.setdefault(account, []).append(entry)
+
+    entity_registry = er.async_get(hass)
+    device_registry = dr.async_get(hass)
+    for (controller, username), entries in accounts.items():
+        merged = [entry for entry in entries if entry.version == 1]
+        if not merged or len(entries) < 2:
+            continue
+        target = next((entry for entry in entries if entry.version > 1), merged[0])
+        sites = dict(target.data.get(CONF_SITES, {}))
+        for entry in merged:
+            site = entry.data.get(CONF_SITE, DEFAULT_SITE)
+            sites.setdefault(site, site)
+        data = {**target.data, CONF_SITES: sites}
+        data.pop(CONF_SITE, None)
+        hass.config_entries.async_update_entry(
+            target, data=data, version=2, unique_id=f"{controller}_{username}"
+        )
+
+        for entry in merged:
+            if entry is target:
+                continue
+            controller_device = device_registry.async_get_device(
+                identifiers={(DOMAIN, entry.entry_id)}
+            )
+            controller_device_id = controller_device.id if controller_device else None
+            for entity in er.async_entries_for_config_entry(
+                entity_registry, entry.entry_id
+            ):
+                if entity.device_id != controller_device_id:
+                    entity_registry.async_update_entity(
+                        entity.entity_id, config_entry_id=target.entry_id
+                    )
+            for device in dr.async_entries_for_config_entry(
+                device_registry, entry.entry_id
+            ):
+                if device.id != controller_device_id:
+                    device_registry.async_update_device(
+                        device.id,
+                        add_config_entry_id=target.entry_id,
+                        remove_config_entry_id=entry.entry_id,
+                    )
+            _LOGGER.info(
+                "Merging site %s of %s into entry %s",
+                entry.data.get(CONF_SITE, DEFAULT_SITE),
+                controller,
+                target.title,
+            )
+            await hass.config_entries.async_remove(entry.entry_id)
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up UniFi WAN Status from a config entry."""
+    client_pool = async_get_client_pool(hass)
+    client = await client_pool.async_acquire(entry)
+    entry.async_on_unload(partial(client_pool.async_release, entry))
+
+    if CONF_UNIFI_OS not in entry.data:
+        # Entries created before the flavor was detected in the config flow
+        try:
+            unifi_os = await client.detect_unifi_os()
+        except UniFiConnectionError as err:
+            raise ConfigEntryNotReady(f"Unable to reach controller: {err}") from err
+        hass.config_entries.async_update_entry(
+            entry, data={**entry.data, CONF_UNIFI_OS: unifi_os}
+        )
+
     coordinator = UniFiWANCoordinator(
         hass,
-        controller=entry.data[CONF_CONTROLLER],
-        username=entry.data[CONF_USERNAME],
-        password=entry.data[CONF_PASSWORD],
-        site=entry.data[CONF_SITE],
-        verify_ssl=entry.data[CONF_VERIFY_SSL],
+        client=client,
+        sites=entry.data[CONF_SITES],
+        discovery_interval=entry.options.get(
+            CONF_DISCOVERY_INTERVAL, DEFAULT_DISCOVERY_INTERVAL
+        ),
+        fast_interval=entry.options.get(CONF_FAST_INTERVAL, DEFAULT_FAST_INTERVAL),
+        stable_interval=entry.options.get(
+            CONF_STABLE_INTERVAL, DEFAULT_STABLE_INTERVAL
+        ),
+        stale_grace=entry.options.get(CONF_STALE_GRACE, DEFAULT_STALE_GRACE),
+        device_interval=entry.options.get(
+            CONF_DEVICE_INTERVAL, DEFAULT_DEVICE_INTERVAL
+        ),
     )
 
-    # Fetch initial data
-    await coordinator.async_config_entry_first_refresh()
+    # Start from the last known WAN data so startup does not wait for the
+    # controller; without a snapshot the WANs must be discovered first.
+    snapshot_store = UniFiSnapshotStore(hass, entry.entry_id)
+    if snapshot := await snapshot_store.async_load():
+        coordinator.async_restore(snapshot)
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN} first refresh"
+        )
+    else:
+        await coordinator.async_config_entry_first_refresh()
+
+        if not coordinator.last_update_success:
+            raise ConfigEntryNotReady("Unable to connect to UniFi Controller")
+
+    @callback
+    def async_save_snapshot() -> None:
+        """Save live WAN data for the next start."""
+        if coordinator.last_update_success and not coordinator.stale:
+            snapshot_store.async_save(coordinator.data)
 
-    if not coordinator.last_update_success:
-        raise ConfigEntryNotReady("Unable to connect to UniFi Controller")
+    async_save_snapshot()
+    entry.async_on_unload(coordinator.async_add_listener(async_save_snapshot))
 
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = coordinator
 
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-
-    # Clean up orphaned entities
-    entity_registry = er.async_get(hass)
+    # Each site groups its gateways under the controller
     device_registry = dr.async_get(hass)
-    
-    # Currently active WAN IDs from coordinator
-    active_wan_ids = coordinator.data.keys()
-    
-    # Identify orphans
-    # Our unique_id format is f"{DOMAIN}_{wan_id}" -> "unifi_wan_status_{mac}_{interface}"
-    
-    # Iterate over a copy of registered entities
-    entries = er.async_entries_for_config_entry(
-        entity_registry, entry.entry_id
+    device_registry.async_get_or_create(
+        config_entry_id=entry.entry_id,
+        identifiers={(DOMAIN, entry.entry_id)},
+        name=entry.title,
+        manufacturer="Ubiquiti",
+        model="UniFi Controller",
+        entry_type=DeviceEntryType.SERVICE,
     )
-    
-    for entity_entry in entries:
-        # Check if this entity's unique identifier matches an active WAN
-        # The unique_id is stored in entity_entry.unique_id
-        # We need to strip the prefix strictly to match wan_id
-        
-        # Example unique_id: unifi_wan_status_28:70:4e:73:d3:66_wan1
-        # The DOMAIN is "unifi_wan_status", so we check if it starts with it
-        
-        # Simpler approach: check if the unique_id corresponds to any active wan_id
-        # We construct expected unique_ids for active wans
-        is_active = False
-        for wan_id in active_wan_ids:
-            expected_unique_id = f"{DOMAIN}_{wan_id}"
-            if entity_entry.unique_id == expected_unique_id:
-                is_active = True
-                break
-        
-        if not is_active:
-            _LOGGER.info("Removing orphaned entity: %s", entity_entry.entity_id)
-            entity_registry.async_remove(entity_entry.entity_id)
+    for site, description in coordinator.sites.items():
+        device_registry.async_get_or_create(
+            config_entry_id=entry.entry_id,
+            identifiers={coordinator.site_device(site)},
+            name=description,
+            manufacturer="Ubiquiti",
+            model="UniFi Site",
+            entry_type=DeviceEntryType.SERVICE,
+            via_device=(DOMAIN, entry.entry_id),
+        )
+
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    if entry.options.get(CONF_PUSH, DEFAULT_PUSH):
+        coordinator.async_start_push(entry)
+
+    if entry.options.get(CONF_IMPORT_STATISTICS, DEFAULT_IMPORT_STATISTICS):
+        if "recorder" in hass.config.components:
+            UniFiStatisticsImporter(hass, entry, coordinator).async_start(entry)
+        else:
+            _LOGGER.warning("Statistics import needs the recorder integration")
+
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
+
+    return True
+
+
+async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Migrate old config entries."""
+    if entry.version == 1:
+        # Version 1 entries monitored a single site
+        data = {**entry.data}
+        site = data.pop(CONF_SITE, DEFAULT_SITE)
+        data[CONF_SITES] = {site: site}
+        # Entries sharing an account were merged in async_setup, so this one
+        # is the account's only entry
+        hass.config_entries.async_update_entry(
+            entry,
+            data=data,
+            version=2,
+            unique_id=f"{data[CONF_CONTROLLER].rstrip('/')}_{data[CONF_USERNAME]}",
+        )
+        _LOGGER.debug("Migrated entry %s to version 2", entry.entry_id)
 
     return True
 
 
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
@@ -87,3 +287,19 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         await coordinator.async_shutdown()
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the entry's stored data and its session if no longer shared."""
+    await UniFiSnapshotStore(hass, entry.entry_id).async_remove()
+    await UniFiStatisticsStore(hass, entry.entry_id).async_remove()
+
+    account = (entry.data[CONF_CONTROLLER], entry.data[CONF_USERNAME])
+    if any(
+        (other.data[CONF_CONTROLLER], other.data[CONF_USERNAME]) == account
+        for other in hass.config_entries.async_entries(DOMAIN)
+        if other.entry_id != entry.entry_id
+    ):
+        return
+    session_store = await async_get_session_store(hass)
+    session_store.async_remove(*account)
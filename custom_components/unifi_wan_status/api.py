@@ -0,0 +1,464 @@
+"""Async client for the UniFi Controller API."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Iterator
+from datetime import datetime
+from hashlib import blake2b
+import logging
+from typing import Any
+
+import aiohttp
+from yarl import URL
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from homeassistant.util.json import json_loads
+
+from .breaker import CircuitBreaker
+from .const import REQUEST_TIMEOUT, STREAM_DECODE_MIN, WS_HEARTBEAT
+from .metrics import ClientMetrics
+from .stream import iter_data
+
+_LOGGER = logging.getLogger(__name__)
+
+CSRF_HEADER = "X-CSRF-Token"
+# Sent by controllers that rotate the token during a session
+UPDATED_CSRF_HEADER = "X-Updated-CSRF-Token"
+# Device lists of large sites compress about tenfold
+ACCEPT_ENCODING = "gzip, deflate"
+# UniFi OS consoles serve the Network application's API under this prefix
+UNIFI_OS_PREFIX = "/proxy/network"
+
+
+class UniFiError(HomeAssistantError):
+    """Base error for UniFi Controller communication."""
+
+
+class UniFiAuthError(UniFiError):
+    """Error to indicate the controller rejected our credentials."""
+
+
+class UniFiConnectionError(UniFiError):
+    """Error to indicate the controller could not be reached."""
+
+
+@callback
+def async_create_session(hass: HomeAssistant, verify_ssl: bool) -> aiohttp.ClientSession:
+    """Create a session with its own cookie jar on Home Assistant's connector.
+
+    The connector (and its cached SSL context) is shared with the rest of
+    Home Assistant, so connections are kept alive between polls. The cookie
+    jar is private because it holds our controller login, and it must accept
+    cookies from bare IP addresses.
+    """
+    return async_create_clientsession(
+        hass, verify_ssl=verify_ssl, cookie_jar=aiohttp.CookieJar(unsafe=True)
+    )
+
+
+class UniFiClient:
+    """Talk to a UniFi Controller over a pooled aiohttp session.
+
+    The session is expected to come from Home Assistant's aiohttp helper so
+    that the keep-alive connector and SSL context are shared and cached.
+    One client (and login) serves every site of the controller account.
+    on_login is called after every successful login, so the new session
+    cookie can be persisted (see session_state and restore_session).
+
+    unifi_os tells UniFi OS consoles (UDM, UCG, Cloud Key Gen2+) from
+    classic controllers. If it is not known, it is detected once before
+    the first login or request (see detect_unifi_os).
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        controller: str,
+        username: str,
+        password: str,
+        on_login: Callable[[], None] | None = None,
+        unifi_os: bool | None = None,
+    ) -> None:
+        """Initialize the client."""
+        self.session = session
+        self.controller = controller.rstrip("/")
+        self.username = username
+        self.password = password
+        self.on_login = on_login
+        self.unifi_os = unifi_os
+        # Shared by every coordinator polling through this client
+        self.breaker = CircuitBreaker()
+        self.metrics = ClientMetrics()
+        self.csrf_token: str | None = None
+        self._logged_in = False
+        self._login_lock = asyncio.Lock()
+
+    @property
+    def logged_in(self) -> bool:
+        """Return True if we hold a session cookie we believe is valid."""
+        return self._logged_in
+
+    @property
+    def session_state(self) -> dict[str, Any] | None:
+        """Return the session cookies and CSRF token, if logged in."""
+        if not self._logged_in:
+            return None
+        cookies = self.session.cookie_jar.filter_cookies(URL(self.controller))
+        return {
+            "cookies": {name: morsel.value for name, morsel in cookies.items()},
+            "csrf_token": self.csrf_token,
+        }
+
+    def restore_session(self, state: dict[str, Any]) -> None:
+        """Reuse a session saved by session_state instead of logging in.
+
+        The cookie may have expired in the meantime; the first request then
+        gets a 401 and we log in as usual.
+        """
+        self.session.cookie_jar.update_cookies(
+            state["cookies"], URL(self.controller)
+        )
+        self.csrf_token = state.get("csrf_token")
+        self._logged_in = True
+
+    @property
+    def _headers(self) -> dict[str, str]:
+        """Return the headers sent with every authenticated request."""
+        if self.csrf_token:
+            return {"Accept-Encoding": ACCEPT_ENCODING, CSRF_HEADER: self.csrf_token}
+        return {"Accept-Encoding": ACCEPT_ENCODING}
+
+    @property
+    def _api_url(self) -> str:
+        """Return the URL the Network API paths are relative to."""
+        if self.unifi_os:
+            return f"{self.controller}{UNIFI_OS_PREFIX}"
+        return self.controller
+
+    async def detect_unifi_os(self) -> bool:
+        """Return True if the controller is a UniFi OS console.
+
+        The result is cached, so only the first call sends a request: UniFi
+        OS answers its landing page with 200, while classic controllers
+        redirect to their /manage application.
+        """
+        async with self._login_lock:
+            await self._detect_unifi_os()
+        return bool(self.unifi_os)
+
+    async def _detect_unifi_os(self) -> None:
+        """Detect the controller flavor once; the caller holds the login lock."""
+        if self.unifi_os is not None:
+            return
+        try:
+            with self.metrics.measure("detect"):
+                async with asyncio.timeout(REQUEST_TIMEOUT):
+                    async with self.session.get(
+                        self.controller, allow_redirects=False
+                    ) as resp:
+                        self.unifi_os = resp.status == 200
+        except (aiohttp.ClientError, TimeoutError) as err:
+            self.metrics.count("connection_errors")
+            raise UniFiConnectionError(f"Error detecting controller: {err}") from err
+        _LOGGER.debug(
+            "%s is a %s controller",
+            self.controller,
+            "UniFi OS" if self.unifi_os else "classic",
+        )
+
+    async def login(self) -> None:
+        """Log in to the UniFi Controller."""
+        async with self._login_lock:
+            await self._detect_unifi_os()
+            await self._login()
+
+    async def _ensure_logged_in(self) -> None:
+        """Log in unless a concurrent request already did."""
+        async with self._login_lock:
+            await self._detect_unifi_os()
+            if not self._logged_in:
+                await self._login()
+
+    async def _login(self) -> None:
+        """Post the credentials; the caller holds the login lock."""
+        if self.unifi_os:
+            login_url = f"{self.controller}/api/auth/login"
+        else:
+            login_url = f"{self.controller}/api/login"
+        login_data = {"username": self.username, "password": self.password}
+
+        self.metrics.count("logins")
+        try:
+            with self.metrics.measure("login"):
+                async with asyncio.timeout(REQUEST_TIMEOUT):
+                    async with self.session.post(login_url, json=login_data) as resp:
+                        if resp.status in (400, 401, 403):
+                            raise UniFiAuthError(f"Login failed: {resp.status}")
+                        if resp.status != 200:
+                            text = await resp.text()
+                            raise UniFiConnectionError(
+                                f"Login failed: {resp.status} - {text}"
+                            )
+                        self.csrf_token = resp.headers.get(CSRF_HEADER)
+        except (aiohttp.ClientError, TimeoutError) as err:
+            self.metrics.count("connection_errors")
+            raise UniFiConnectionError(f"Login error: {err}") from err
+
+        self._logged_in = True
+        _LOGGER.debug("Successfully logged in to UniFi Controller")
+        if self.on_login is not None:
+            self.on_login()
+
+    async def request(
+        self, method: str, path: str, json: Any | None = None
+    ) -> list[dict[str, Any]]:
+        """Request an API path and return its "data" list."""
+        data, _ = await self.request_if_changed(method, path, json)
+        return data or []
+
+    async def request_if_changed(
+        self,
+        method: str,
+        path: str,
+        json: Any | None = None,
+        fingerprint: str | None = None,
+    ) -> tuple[list[dict[str, Any]] | None, str]:
+        """Request an API path and return its "data" list and fingerprint.
+
+        If the body's fingerprint equals the given one, the body is not
+        decoded and None is returned instead of the data, so callers can
+        keep what they built from the previous answer.
+
+        A 401 answer means the session cookie expired; we log in again once
+        and retry the request.
+        """
+        body, new_fingerprint = await self._request_body(
+            method, path, json, fingerprint
+        )
+        if body is None:
+            return None, new_fingerprint
+        try:
+            with self.metrics.measure("decode"):
+                payload = json_loads(body)
+        except ValueError as err:
+            raise UniFiConnectionError(f"Invalid JSON from {path}: {err}") from err
+        return payload.get("data", []), new_fingerprint
+
+    async def stream_if_changed(
+        self,
+        method: str,
+        path: str,
+        json: Any | None = None,
+        fingerprint: str | None = None,
+    ) -> tuple[Iterator[dict[str, Any]] | None, str]:
+        """Request an API path like request_if_changed, decoding lazily.
+
+        Large answers have their "data" items decoded one at a time as the
+        returned iterator is consumed, so a caller that keeps only a few of
+        them never holds the whole list; see _iter_items. Invalid JSON
+        raises UniFiConnectionError from the iterator.
+        """
+        body, new_fingerprint = await self._request_body(
+            method, path, json, fingerprint
+        )
+        if body is None:
+            return None, new_fingerprint
+        return _iter_items(body, path), new_fingerprint
+
+    async def _request_body(
+        self,
+        method: str,
+        path: str,
+        json: Any | None,
+        fingerprint: str | None,
+    ) -> tuple[bytes | None, str]:
+        """Request an API path and return its body, None if unchanged."""
+        await self._ensure_logged_in()
+
+        url = f"{self._api_url}/{path}"
+        # Round trips are timed per endpoint: device, health, sites, ...
+        endpoint = path.rsplit("/", 1)[-1]
+        status, body = await self._request(method, url, json, endpoint)
+
+        if status == 401:
+            # Session expired, try to login again
+            self.metrics.count("relogins")
+            self._logged_in = False
+            await self._ensure_logged_in()
+            status, body = await self._request(method, url, json, endpoint)
+
+        if status == 401:
+            self._logged_in = False
+            raise UniFiAuthError(f"Unauthorized fetching {path}")
+        if status != 200:
+            raise UniFiConnectionError(f"Error fetching {path}: {status}")
+
+        if (new_fingerprint := _fingerprint(body)) == fingerprint:
+            self.metrics.count("unchanged")
+            return None, new_fingerprint
+        return body, new_fingerprint
+
+    async def _request(
+        self, method: str, url: str, json: Any | None, endpoint: str
+    ) -> tuple[int, bytes]:
+        """Perform a single request and return the raw body."""
+        body = b""
+        try:
+            with self.metrics.measure(endpoint):
+                async with asyncio.timeout(REQUEST_TIMEOUT):
+                    async with self.session.request(
+                        method, url, json=json, headers=self._headers
+                    ) as resp:
+                        if token := resp.headers.get(UPDATED_CSRF_HEADER):
+                            self.csrf_token = token
+                        status = resp.status
+                        if status == 200:
+                            body = await resp.read()
+        except (aiohttp.ClientError, TimeoutError) as err:
+            self.metrics.count("connection_errors")
+            raise UniFiConnectionError(f"Error communicating with {url}: {err}") from err
+
+        self.metrics.record_response(endpoint, status, len(body))
+        return status, body
+
+    async def get_sites(self) -> list[dict[str, Any]]:
+        """Return the sites this account can access."""
+        return await self.request("GET", "api/self/sites")
+
+    async def get_devices(
+        self, site: str, macs: list[str] | None = None
+    ) -> list[dict[str, Any]]:
+        """Return the site's device list, or only the devices in macs."""
+        path = f"api/s/{site}/stat/device"
+        if macs is None:
+            return await self.request("GET", path)
+        return await self.request("POST", path, {"macs": macs})
+
+    async def get_devices_if_changed(
+        self,
+        site: str,
+        macs: list[str] | None = None,
+        fingerprint: str | None = None,
+    ) -> tuple[Iterator[dict[str, Any]] | None, str]:
+        """Return the devices like get_devices, unless the fingerprint matches.
+
+        Device lists of large sites are mostly access points and switches,
+        so the devices are decoded lazily; see stream_if_changed.
+        """
+        path = f"api/s/{site}/stat/device"
+        if macs is None:
+            return await self.stream_if_changed("GET", path, fingerprint=fingerprint)
+        return await self.stream_if_changed(
+            "POST", path, {"macs": macs}, fingerprint
+        )
+
+    async def get_gateway_report(
+        self,
+        site: str,
+        mac: str,
+        start: datetime,
+        end: datetime,
+        attrs: list[str],
+    ) -> list[dict[str, Any]]:
+        """Return a gateway's hourly report rows between start and end."""
+        return await self.request(
+            "POST",
+            f"api/s/{site}/stat/report/hourly.gw",
+            {
+                "attrs": ["time", *attrs],
+                "start": int(start.timestamp() * 1000),
+                "end": int(end.timestamp() * 1000),
+                "mac": mac,
+            },
+        )
+
+    async def get_health(self, site: str) -> list[dict[str, Any]]:
+        """Return the site's subsystem health list."""
+        data, _ = await self.get_health_if_changed(site)
+        return data or []
+
+    async def get_health_if_changed(
+        self, site: str, fingerprint: str | None = None
+    ) -> tuple[list[dict[str, Any]] | None, str]:
+        """Return the health list like get_health, unless its fingerprint matches.
+
+        See request_if_changed.
+        """
+        return await self.request_if_changed(
+            "GET", f"api/s/{site}/stat/health", fingerprint=fingerprint
+        )
+
+    async def listen(
+        self,
+        site: str,
+        on_message: Callable[[dict[str, Any]], None],
+        on_connect: Callable[[], None] | None = None,
+    ) -> None:
+        """Stream the site's event websocket until it closes.
+
+        Every JSON message is handed to on_message. A handshake rejected with
+        401 means the session cookie expired; we log in again once and retry.
+        """
+        await self._ensure_logged_in()
+        url = f"{self._api_url}/wss/s/{site}/events".replace("http", "ws", 1)
+
+        try:
+            try:
+                ws = await self.session.ws_connect(
+                    url, heartbeat=WS_HEARTBEAT, headers=self._headers
+                )
+            except aiohttp.WSServerHandshakeError as err:
+                if err.status != 401:
+                    raise
+                self.metrics.count("relogins")
+                self._logged_in = False
+                await self._ensure_logged_in()
+                ws = await self.session.ws_connect(
+                    url, heartbeat=WS_HEARTBEAT, headers=self._headers
+                )
+
+            try:
+                if on_connect is not None:
+                    on_connect()
+                async for msg in ws:
+                    if msg.type == aiohttp.WSMsgType.TEXT:
+                        on_message(msg.json(loads=json_loads))
+                    elif msg.type == aiohttp.WSMsgType.ERROR:
+                        raise UniFiConnectionError(f"Websocket error: {ws.exception()}")
+            finally:
+                await ws.close()
+        except (aiohttp.ClientError, TimeoutError, ValueError) as err:
+            raise UniFiConnectionError(f"Websocket error: {err}") from err
+
+
+def _iter_items(body: bytes, path: str) -> Iterator[dict[str, Any]]:
+    """Yield the "data" items of a body, raising UniFiConnectionError.
+
+    Bodies smaller than STREAM_DECODE_MIN are decoded whole with Home
+    Assistant's orjson decoder, which is several times faster. Larger ones
+    are decoded one item at a time by the slower stdlib scanner, so the
+    whole list is never built; the body itself is still held in full.
+    """
+    try:
+        if len(body) >= STREAM_DECODE_MIN:
+            yield from iter_data(body)
+            return
+        payload = json_loads(body)
+        if not isinstance(payload, dict) or not isinstance(
+            data := payload.get("data", []), list
+        ):
+            raise ValueError("Expected an object with a data list")
+        yield from data
+    except ValueError as err:
+        raise UniFiConnectionError(f"Invalid JSON from {path}: {err}") from err
+
+
+def _fingerprint(body: bytes) -> str:
+    """Return a short digest of a response body.
+
+    Hashing is several times cheaper than decoding the JSON, so unchanged
+    answers are recognized before any parsing.
+    """
+    return blake2b(body, digest_size=16).hexdigest()
@@ -0,0 +1,51 @@
+"""Circuit breaker for UniFi Controller polling."""
+from __future__ import annotations
+
+import time
+
+from .const import BREAKER_RESET_TIMEOUT, BREAKER_THRESHOLD
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Stop polling a controller that keeps failing.
+
+    After BREAKER_THRESHOLD failed poll cycles in a row the circuit opens
+    and cycles fail fast without touching the network. Once the reset
+    timeout has passed it turns half open: the next cycle sends one cheap
+    probe, which closes the circuit if it succeeds and reopens it if not.
+    """
+
+    def __init__(
+        self,
+        threshold: int = BREAKER_THRESHOLD,
+        reset_timeout: float = BREAKER_RESET_TIMEOUT,
+    ) -> None:
+        """Initialize the breaker."""
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: float | None = None
+
+    @property
+    def state(self) -> str:
+        """Return the current state."""
+        if self._opened_at is None:
+            return STATE_CLOSED
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return STATE_OPEN
+        return STATE_HALF_OPEN
+
+    def record_success(self) -> None:
+        """Close the circuit."""
+        self.failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        """Count a failed cycle or probe, opening the circuit if needed."""
+        self.failures += 1
+        if self._opened_at is not None or self.failures >= self.threshold:
+            self._opened_at = time.monotonic()
@@ -4,36 +4,52 @@ from __future__ import annotations
 import logging
 from typing import Any
 
-import requests
-import urllib3
 import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
 
+from .api import (
+    UniFiAuthError,
+    UniFiClient,
+    UniFiConnectionError,
+    async_create_session,
+)
 from .const import (
     CONF_CONTROLLER,
-    CONF_SITE,
+    CONF_DEVICE_INTERVAL,
+    CONF_DISCOVERY_INTERVAL,
+    CONF_FAST_INTERVAL,
+    CONF_IMPORT_STATISTICS,
+    CONF_PUSH,
+    CONF_SITES,
+    CONF_STABLE_INTERVAL,
+    CONF_STALE_GRACE,
+    CONF_UNIFI_OS,
     CONF_VERIFY_SSL,
-    DEFAULT_SITE,
+    DEFAULT_DEVICE_INTERVAL,
+    DEFAULT_DISCOVERY_INTERVAL,
+    DEFAULT_FAST_INTERVAL,
+    DEFAULT_IMPORT_STATISTICS,
+    DEFAULT_PUSH,
+    DEFAULT_STABLE_INTERVAL,
+    DEFAULT_STALE_GRACE,
     DEFAULT_VERIFY_SSL,
     DOMAIN,
 )
+from .storage import async_get_session_store
 
 _LOGGER = logging.getLogger(__name__)
 
-# Disable SSL warnings
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
 STEP_USER_DATA_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_CONTROLLER, default="https://192.168.1.1:8443"): str,
         vol.Required(CONF_USERNAME): str,
         vol.Required(CONF_PASSWORD): str,
-        vol.Optional(CONF_SITE, default=DEFAULT_SITE): str,
         vol.Optional(CONF_VERIFY_SSL, default=DEFAULT_VERIFY_SSL): bool,
     }
 )
@@ -44,56 +60,64 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
 
     Data has the keys from STEP_USER_DATA_SCHEMA with values provided by the user.
     """
-    session = requests.Session()
+    session = async_create_session(hass, data[CONF_VERIFY_SSL])
+    client = UniFiClient(
+        session,
+        data[CONF_CONTROLLER],
+        data[CONF_USERNAME],
+        data[CONF_PASSWORD],
+    )
 
     try:
-        # Attempt to log in
-        login_url = f"{data[CONF_CONTROLLER]}/api/login"
-        login_data = {
-            "username": data[CONF_USERNAME],
-            "password": data[CONF_PASSWORD],
-        }
+        # Attempt to log in; this detects UniFi OS once, for the entry to keep
+        await client.login()
 
-        resp = await hass.async_add_executor_job(
-            lambda: session.post(
-                login_url,
-                json=login_data,
-                verify=data[CONF_VERIFY_SSL],
-                timeout=10,
-            )
-        )
+        # The sites this account can see, name (used in API paths) -> description
+        sites = {
+            site["name"]: site.get("desc") or site["name"]
+            for site in await client.get_sites()
+        }
 
-        if resp.status_code != 200:
-            raise InvalidAuth
-
-        # Try to fetch devices to ensure we have access
-        devices_url = f"{data[CONF_CONTROLLER]}/api/s/{data[CONF_SITE]}/stat/device"
-        resp = await hass.async_add_executor_job(
-            lambda: session.get(
-                devices_url,
-                verify=data[CONF_VERIFY_SSL],
-                timeout=10,
-            )
-        )
+    except UniFiAuthError as err:
+        raise InvalidAuth from err
+    except UniFiConnectionError as err:
+        raise CannotConnect from err
+    finally:
+        session.detach()
 
-        if resp.status_code != 200:
-            raise CannotConnect
+    # The entry's first start reuses this login
+    session_store = await async_get_session_store(hass)
+    session_store.async_save(client)
 
-    except requests.exceptions.Timeout:
-        raise CannotConnect
-    except requests.exceptions.RequestException:
-        raise CannotConnect
-    finally:
-        await hass.async_add_executor_job(session.close)
+    if not sites:
+        raise CannotConnect("No sites visible to this account")
 
     # Return info that you want to store in the config entry.
-    return {"title": f"UniFi Controller ({data[CONF_CONTROLLER]})"}
+    return {
+        "title": f"UniFi Controller ({data[CONF_CONTROLLER]})",
+        "sites": sites,
+        "unifi_os": client.unifi_os,
+    }
 
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for UniFi WAN Status."""
 
-    VERSION = 1
+    VERSION = 2
+
+    def __init__(self) -> None:
+        """Initialize the config flow."""
+        self._data: dict[str, Any] = {}
+        self._title = ""
+        self._sites: dict[str, str] = {}
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> OptionsFlowHandler:
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler()
 
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
@@ -112,12 +136,106 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 _LOGGER.exception("Unexpected exception")
                 errors["base"] = "unknown"
             else:
-                return self.async_create_entry(title=info["title"], data=user_input)
+                # One entry per controller account, covering its sites
+                controller = user_input[CONF_CONTROLLER].rstrip("/")
+                await self.async_set_unique_id(
+                    f"{controller}_{user_input[CONF_USERNAME]}"
+                )
+                self._abort_if_unique_id_configured()
+
+                self._data = {**user_input, CONF_UNIFI_OS: info["unifi_os"]}
+                self._title = info["title"]
+                self._sites = info["sites"]
+                if len(self._sites) == 1:
+                    return self._async_create_entry(list(self._sites))
+                return await self.async_step_sites()
 
         return self.async_show_form(
             step_id="user", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
         )
 
+    async def async_step_sites(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Let the user pick the sites to monitor."""
+        if user_input is not None:
+            return self._async_create_entry(user_input[CONF_SITES])
+
+        return self.async_show_form(
+            step_id="sites",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(CONF_SITES, default=list(self._sites)): vol.All(
+                        cv.multi_select(self._sites), vol.Length(min=1)
+                    ),
+                }
+            ),
+        )
+
+    @callback
+    def _async_create_entry(self, sites: list[str]) -> FlowResult:
+        """Create the entry for the selected sites."""
+        return self.async_create_entry(
+            title=self._title,
+            data={**self._data, CONF_SITES: {site: self._sites[site] for site in sites}},
+        )
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle UniFi WAN Status options."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the polling options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_FAST_INTERVAL,
+                        default=options.get(CONF_FAST_INTERVAL, DEFAULT_FAST_INTERVAL),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=5)),
+                    vol.Optional(
+                        CONF_STABLE_INTERVAL,
+                        default=options.get(
+                            CONF_STABLE_INTERVAL, DEFAULT_STABLE_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=60)),
+                    vol.Optional(
+                        CONF_DEVICE_INTERVAL,
+                        default=options.get(
+                            CONF_DEVICE_INTERVAL, DEFAULT_DEVICE_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=10)),
+                    vol.Optional(
+                        CONF_DISCOVERY_INTERVAL,
+                        default=options.get(
+                            CONF_DISCOVERY_INTERVAL, DEFAULT_DISCOVERY_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=60)),
+                    vol.Optional(
+                        CONF_PUSH,
+                        default=options.get(CONF_PUSH, DEFAULT_PUSH),
+                    ): bool,
+                    vol.Optional(
+                        CONF_STALE_GRACE,
+                        default=options.get(CONF_STALE_GRACE, DEFAULT_STALE_GRACE),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_IMPORT_STATISTICS,
+                        default=options.get(
+                            CONF_IMPORT_STATISTICS, DEFAULT_IMPORT_STATISTICS
+                        ),
+                    ): bool,
+                }
+            ),
+        )
+
 
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
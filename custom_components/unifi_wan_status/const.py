@@ -4,15 +4,82 @@ DOMAIN = "unifi_wan_status"
 
 # Configuration
 CONF_CONTROLLER = "controller"
-CONF_SITE = "site"
+CONF_SITE = "site"  # single site of version 1 entries
+CONF_SITES = "sites"
 CONF_VERIFY_SSL = "verify_ssl"
+CONF_UNIFI_OS = "unifi_os"  # detected controller flavor
+
+# Options
+CONF_DISCOVERY_INTERVAL = "discovery_interval"
+CONF_DEVICE_INTERVAL = "device_interval"
+CONF_PUSH = "push"
+CONF_FAST_INTERVAL = "fast_interval"
+CONF_STABLE_INTERVAL = "stable_interval"
+CONF_STALE_GRACE = "stale_grace"
+CONF_IMPORT_STATISTICS = "import_statistics"
 
 # Defaults
 DEFAULT_SITE = "default"
 DEFAULT_VERIFY_SSL = False
 DEFAULT_SCAN_INTERVAL = 60  # seconds
+DEFAULT_FAST_INTERVAL = 10  # seconds, while a WAN is down or flapping
+DEFAULT_STABLE_INTERVAL = 300  # seconds, once all WANs have been stable
+DEFAULT_DISCOVERY_INTERVAL = 3600  # seconds
+DEFAULT_DEVICE_INTERVAL = 300  # seconds between device fetches without changes
+DEFAULT_PUSH = False
+DEFAULT_STALE_GRACE = 900  # seconds the last good data is served on errors
+DEFAULT_IMPORT_STATISTICS = False
+RECONCILE_INTERVAL = 600  # seconds, polling while the websocket is connected
+REQUEST_TIMEOUT = 10  # seconds
+STREAM_DECODE_MIN = 256 * 1024  # bytes; smaller device lists are decoded whole
+SITE_CONCURRENCY = 4  # sites polled at the same time
+REFRESH_COALESCE_WINDOW = 2  # seconds a finished fetch answers new refreshes
+CYCLE_DEADLINE = 30  # seconds, upper bound for one poll cycle
+RETRY_BUDGET = 2  # site fetch retries per poll cycle
+BREAKER_THRESHOLD = 3  # failed cycles in a row that open the circuit
+BREAKER_RESET_TIMEOUT = 60  # seconds before an open circuit is probed
+WS_HEARTBEAT = 30  # seconds
+WS_RECONNECT_MIN = 5  # seconds
+WS_RECONNECT_MAX = 300  # seconds
+ORPHAN_GRACE = 900  # seconds a WAN must be missing before its sensors are removed
+
+# Storage
+SESSION_STORAGE_KEY = f"{DOMAIN}.sessions"
+SESSION_STORAGE_VERSION = 1
+SESSION_SAVE_DELAY = 10  # seconds
+SNAPSHOT_STORAGE_KEY = f"{DOMAIN}.snapshot"
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 60  # seconds
+STATISTICS_STORAGE_KEY = f"{DOMAIN}.statistics"
+STATISTICS_STORAGE_VERSION = 1
+
+# Long-term statistics imported from the controller's hourly gateway reports
+STATISTICS_IMPORT_INTERVAL = 3600  # seconds
+STATISTICS_BACKFILL = 7 * 86400  # seconds, how far back the first import goes
+STATISTICS_BATCH = 86400  # seconds of reports per request
+STATISTICS_RETENTION = 7 * 86400  # seconds the controller keeps hourly reports
+
+# Adaptive polling
+FLAP_WINDOW = 900  # seconds over which WAN transitions are counted
+FLAP_THRESHOLD = 3  # transitions within FLAP_WINDOW that count as flapping
+SETTLE_TIME = 300  # seconds of fast polling after a failover
+STABLE_AFTER = 1800  # seconds without transitions before relaxing
+BACKOFF_MAX_INTERVAL = 900  # seconds
+BACKOFF_JITTER = 0.2  # +/- fraction applied to backoff intervals
+
+# Throughput rates
+MAX_RATE_GAP = 1800  # seconds between counter samples before rates restart
+
+# WAN history
+HISTORY_SLOT = 60  # seconds per ring buffer slot
+HISTORY_WINDOWS = {"1h": 3600, "24h": 86400, "7d": 7 * 86400}
+HISTORY_MAX_GAP = 2 * RECONCILE_INTERVAL  # seconds between samples counted as observed
+
+# Services
+SERVICE_REFRESH = "refresh"
 
 # Attributes
+ATTR_MAC = "mac"
 ATTR_DEVICE_NAME = "device_name"
 ATTR_DEVICE_MODEL = "device_model"
 ATTR_IP_ADDRESS = "ip_address"
@@ -25,9 +92,9 @@ ATTR_ISP_NAME = "isp_name"
 ATTR_ISP_ORGANIZATION = "isp_organization"
 ATTR_WAN_TYPE = "wan_type"
 ATTR_NETMASK = "netmask"
-ATTR_RX_BYTES = "rx_bytes"
-ATTR_TX_BYTES = "tx_bytes"
-ATTR_RX_PACKETS = "rx_packets"
-ATTR_TX_PACKETS = "tx_packets"
-ATTR_UPTIME = "uptime"
-ATTR_LATENCY = "latency"
+ATTR_STALE = "stale"
+ATTR_STALE_SINCE = "stale_since"
+
+# Duplex sensor states
+DUPLEX_FULL = "full"
+DUPLEX_HALF = "half"
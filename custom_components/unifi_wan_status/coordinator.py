@@ -1,34 +1,75 @@
 """DataUpdateCoordinator for UniFi WAN Status."""
 from __future__ import annotations
 
-from datetime import timedelta
+import asyncio
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from datetime import datetime, timedelta
+from functools import partial
 import logging
+import time
 from typing import Any
 
-import requests
-import urllib3
-from homeassistant.core import HomeAssistant
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
-from .const import DEFAULT_SCAN_INTERVAL, DOMAIN
+from .api import UniFiClient, UniFiConnectionError, UniFiError
+from .breaker import STATE_HALF_OPEN, STATE_OPEN
+from .const import (
+    CYCLE_DEADLINE,
+    DEFAULT_DEVICE_INTERVAL,
+    DEFAULT_DISCOVERY_INTERVAL,
+    DEFAULT_FAST_INTERVAL,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_STABLE_INTERVAL,
+    DEFAULT_STALE_GRACE,
+    DOMAIN,
+    REFRESH_COALESCE_WINDOW,
+    REQUEST_TIMEOUT,
+    RETRY_BUDGET,
+    SITE_CONCURRENCY,
+    WS_RECONNECT_MAX,
+    WS_RECONNECT_MIN,
+)
+from .history import HistoryTracker
+from .metrics import CoordinatorMetrics
+from .models import DATA_FIELDS, OPTIONAL_FIELDS, HealthSummary, WANRecord
+from .rates import RATE_KEYS, RateTracker
+from .scheduler import PollScheduler
 
 _LOGGER = logging.getLogger(__name__)
 
-# Disable SSL warnings for self-signed certificates
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+class UniFiWANCoordinator(DataUpdateCoordinator[dict[str, WANRecord]]):
+    """Class to manage fetching UniFi WAN data.
 
-class UniFiWANCoordinator(DataUpdateCoordinator):
-    """Class to manage fetching UniFi WAN data."""
+    One coordinator polls every site of a config entry in a single scheduled
+    cycle, fanning out over the sites with at most SITE_CONCURRENCY sites in
+    flight. Sites that fail keep their last known WANs until they answer
+    again; the cycle only fails if every site does.
+
+    Each site is polled in two tiers: every cycle requests the small
+    stat/health answer as a heartbeat, and the device list is only
+    fetched when the heartbeat shows a WAN or gateway change, or once
+    device_interval has passed since the site's last device fetch.
+
+    Listeners are only called when the WAN data changed (always_update is
+    off), so polls that return what the previous one did cost a request
+    and a hash per site, nothing more.
+    """
 
     def __init__(
         self,
         hass: HomeAssistant,
-        controller: str,
-        username: str,
-        password: str,
-        site: str,
-        verify_ssl: bool,
+        client: UniFiClient,
+        sites: dict[str, str],
+        discovery_interval: int = DEFAULT_DISCOVERY_INTERVAL,
+        fast_interval: int = DEFAULT_FAST_INTERVAL,
+        stable_interval: int = DEFAULT_STABLE_INTERVAL,
+        stale_grace: int = DEFAULT_STALE_GRACE,
+        device_interval: int = DEFAULT_DEVICE_INTERVAL,
     ) -> None:
         """Initialize the coordinator."""
         super().__init__(
@@ -36,189 +77,804 @@ class UniFiWANCoordinator(DataUpdateCoordinator):
             _LOGGER,
             name=DOMAIN,
             update_interval=timedelta(seconds=DEFAULT_SCAN_INTERVAL),
+            always_update=False,
         )
-        self.controller = controller
-        self.username = username
-        self.password = password
-        self.site = site
-        self.verify_ssl = verify_ssl
-        self.session = requests.Session()
-        self._logged_in = False
-
-    async def _async_update_data(self) -> dict[str, Any]:
-        """Fetch data from UniFi Controller."""
-        try:
-            # Ensure we're logged in
-            if not self._logged_in:
-                await self.hass.async_add_executor_job(self._login)
+        self.client = client
+        # Site name (as used in API paths) -> description
+        self.sites = sites
+        self._site_limit = asyncio.Semaphore(SITE_CONCURRENCY)
+        # Last successful stat/health answer per site and its summary, kept
+        # when a cycle's health request fails
+        self._health_data: dict[str, list[dict[str, Any]]] = {}
+        self._health_summaries: dict[str, HealthSummary | None] = {}
+        # Heartbeat summary each site's last device fetch was made under,
+        # and when that fetch happened
+        self.device_interval = device_interval
+        self._device_summaries: dict[str, HealthSummary | None] = {}
+        self._last_device_fetch: dict[str, float] = {}
+        # Gateways found by the last full stat/device download of each site.
+        # Between discoveries only these devices are requested.
+        self.discovery_interval = discovery_interval
+        self._gateway_macs: dict[str, set[str]] = {}
+        self._last_discovery: dict[str, float] = {}
+        # Raw gateway objects from the last poll, per site and MAC. Websocket
+        # updates are applied on top of these so only the affected WANs are
+        # rebuilt.
+        self._gateway_devices: dict[str, dict[str, dict[str, Any]]] = {}
+        # Body fingerprints of the last stat/device and stat/health answers
+        # per site, and the pair the site's current WANs were built from
+        self._device_fingerprints: dict[str, str] = {}
+        self._health_fingerprints: dict[str, str] = {}
+        self._built_from: dict[str, tuple[str, str | None]] = {}
+        self._push_sites: set[str] = set()
+        self._push_retry_delay: dict[str, float] = {}
+        self.scheduler = PollScheduler(
+            fast_interval, DEFAULT_SCAN_INTERVAL, stable_interval
+        )
+        self._schedule_listeners: list[CALLBACK_TYPE] = []
+        self.rates = RateTracker()
+        # Optional WANRecord fields -> enabled entities showing them. Every
+        # field is extracted until the first entity is added, so the first
+        # update has whatever the entities turn out to need.
+        self._field_users: Counter[str] = Counter()
+        self.wan_fields: frozenset[str] = OPTIONAL_FIELDS
+        self._rebuild_pending = False
+        # Rolling availability, flaps and latency, fed by every live update
+        self.history = HistoryTracker()
+        self._history_listeners: list[CALLBACK_TYPE] = []
+        # Cycle and extraction timings, exposed through diagnostics
+        self.metrics = CoordinatorMetrics()
+        # wan_id -> WAN data keys that changed in the last update
+        self.changes: dict[str, frozenset[str]] = {}
+        # True while data is a restored snapshot, or the last good data
+        # served through controller errors for up to stale_grace seconds
+        self.stale = False
+        self.stale_grace = stale_grace
+        self.last_success: datetime | None = None
+        self._last_good = time.monotonic()
+        self._retry_budget = RETRY_BUDGET
+        # Single-flight fetches shared by concurrent refreshes
+        self._fetch_task: asyncio.Task[dict[str, WANRecord]] | None = None
+        self._last_fetch = float("-inf")
+        self._gateway_fetches: dict[str, asyncio.Task[None]] = {}
 
-            # Fetch device data
-            data = await self.hass.async_add_executor_job(self._fetch_devices)
+    @property
+    def push_connected(self) -> bool:
+        """Return True if every site's event websocket is connected."""
+        return self._push_sites.issuperset(self.sites)
+
+    def site_device(self, site: str) -> tuple[str, str]:
+        """Return the device registry identifier of a site."""
+        return (DOMAIN, f"{self.client.controller}/{site}")
+
+    async def _async_update_data(self) -> dict[str, WANRecord]:
+        """Fetch data from UniFi Controller, coalescing concurrent refreshes.
+
+        Scheduled polls, entity update requests and the refresh service can
+        all ask for data at the same time. A refresh that arrives while a
+        fetch is in flight, or within REFRESH_COALESCE_WINDOW after one
+        succeeded, shares its result instead of fetching again. The first
+        caller's listeners have already handled the changes by the time the
+        others resume, so those report none.
+        """
+        if (fetch := self._fetch_task) is not None:
+            data = await asyncio.shield(fetch)
+            self.changes = {}
             return data
 
-        except requests.exceptions.RequestException as err:
-            # If authentication fails, try to log in again
-            self._logged_in = False
-            raise UpdateFailed(f"Error communicating with UniFi Controller: {err}")
+        if (
+            self.data is not None
+            and not self.stale
+            and time.monotonic() - self._last_fetch < REFRESH_COALESCE_WINDOW
+        ):
+            self.changes = {}
+            return self.data
 
-    def _login(self) -> None:
-        """Log in to the UniFi Controller."""
-        login_url = f"{self.controller}/api/login"
-        login_data = {"username": self.username, "password": self.password}
-        
+        self._fetch_task = fetch = self.hass.async_create_task(
+            self._async_fetch_sites(), f"{DOMAIN} fetch"
+        )
         try:
-            resp = self.session.post(
-                login_url,
-                json=login_data,
-                verify=self.verify_ssl,
-                timeout=10
-            )
-            
-            if resp.status_code != 200:
-                raise UpdateFailed(f"Login failed: {resp.status_code} - {resp.text}")
-            
-            self._logged_in = True
-            _LOGGER.debug("Successfully logged in to UniFi Controller")
-            
-        except requests.exceptions.RequestException as err:
-            raise UpdateFailed(f"Login error: {err}")
+            data = await asyncio.shield(fetch)
+        finally:
+            self._fetch_task = None
+        self._last_fetch = time.monotonic()
+        return data
 
-    def _fetch_devices(self) -> dict[str, Any]:
-        """Fetch device data from UniFi Controller."""
-        devices_url = f"{self.controller}/api/s/{self.site}/stat/device"
-        
+    async def _async_fetch_sites(self) -> dict[str, WANRecord]:
+        """Fetch every site and update the schedule and change set.
+
+        When the whole cycle fails, the last good data is served (marked
+        stale) for up to stale_grace seconds before entities become
+        unavailable, so a controller upgrade does not flap every sensor.
+        """
+        self.metrics.count("cycles")
         try:
-            resp = self.session.get(
-                devices_url,
-                verify=self.verify_ssl,
-                timeout=10
+            with self.metrics.measure("cycle"):
+                wan_data, fetched = await self._async_poll_sites()
+        except UniFiError as err:
+            self.metrics.count("failed_cycles")
+            self._set_interval(self.scheduler.record_failure())
+            if (
+                self.data is None
+                or time.monotonic() - self._last_good > self.stale_grace
+            ):
+                raise UpdateFailed(
+                    f"Error communicating with UniFi Controller: {err}"
+                ) from err
+            self.changes = {}
+            if not self.stale:
+                _LOGGER.warning("Serving last known WAN data: %s", err)
+                self.stale = True
+                # The data itself is unchanged, so the coordinator will not
+                # call the listeners; entities still need to show staleness
+                self.async_update_listeners()
+            return self.data
+
+        self._set_interval(
+            self.scheduler.record_success(
+                {wan_id: wan.is_up for wan_id, wan in wan_data.items()}
             )
-            
-            if resp.status_code == 401:
-                # Session expired, try to login again
-                self._logged_in = False
-                self._login()
-                resp = self.session.get(
-                    devices_url,
-                    verify=self.verify_ssl,
-                    timeout=10
+        )
+        self.last_success = dt_util.utcnow()
+        self._last_good = time.monotonic()
+        self.history.prune(wan_data)
+        # WANs carried over from failed sites were not observed this cycle
+        self._async_record_history(
+            wan for wan in wan_data.values() if wan.site in fetched
+        )
+        was_stale, self.stale = self.stale, False
+        if wan_data == self.data:
+            self.changes = {}
+            if was_stale:
+                self.async_update_listeners()
+            return self.data
+        self.changes = _diff_wan_data(self.data or {}, wan_data)
+        return wan_data
+
+    async def _async_poll_sites(self) -> tuple[dict[str, WANRecord], set[str]]:
+        """Poll every site through the client's circuit breaker.
+
+        An open circuit fails the cycle without a request; a half-open one
+        first sends a single health request as a cheap probe. Site fetches
+        share a retry budget and must finish before the cycle deadline.
+        Sites that fail keep their last known WANs; the cycle only fails
+        if every site does. Returns the WANs and the sites that answered.
+        """
+        breaker = self.client.breaker
+        state = breaker.state
+        if state == STATE_OPEN:
+            raise UniFiConnectionError("Controller circuit is open, skipping poll")
+        if state == STATE_HALF_OPEN:
+            try:
+                await self.client.get_health(next(iter(self.sites)))
+            except UniFiError:
+                breaker.record_failure()
+                raise
+            breaker.record_success()
+
+        self._retry_budget = RETRY_BUDGET
+        tasks = {
+            site: asyncio.create_task(self._fetch_site(site)) for site in self.sites
+        }
+        # A site may need a heartbeat and then its device list, so fast
+        # polling still leaves room for two requests in a row
+        deadline = max(2 * REQUEST_TIMEOUT, self.scheduler.interval)
+        _, pending = await asyncio.wait(
+            tasks.values(), timeout=min(CYCLE_DEADLINE, deadline)
+        )
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+
+        wan_data: dict[str, WANRecord] = {}
+        fetched: set[str] = set()
+        errors: list[UniFiError] = []
+        for site, task in tasks.items():
+            if task in pending:
+                error: BaseException | None = UniFiConnectionError(
+                    f"Poll cycle deadline reached before {site} answered"
                 )
-            
-            if resp.status_code != 200:
-                raise UpdateFailed(
-                    f"Error fetching devices: {resp.status_code} - {resp.text}"
+            else:
+                error = task.exception()
+            if error is None:
+                wan_data.update(task.result())
+                fetched.add(site)
+                continue
+            if not isinstance(error, UniFiError):
+                raise error
+            _LOGGER.warning("Error fetching site %s: %s", site, error)
+            errors.append(error)
+            # Keep the site's last known WANs until it answers again
+            wan_data.update(
+                (wan_id, wan)
+                for wan_id, wan in (self.data or {}).items()
+                if wan.site == site
+            )
+
+        if len(errors) == len(self.sites):
+            breaker.record_failure()
+            raise errors[0]
+        breaker.record_success()
+        return wan_data, fetched
+
+    @callback
+    def async_restore(self, data: dict[str, WANRecord]) -> None:
+        """Start from a saved snapshot until the first live update arrives.
+
+        The snapshot counts as the last good data, so it is served through
+        controller errors for the stale grace period after startup.
+        """
+        self.data = data
+        self.stale = True
+        self._last_good = time.monotonic()
+
+    def _set_interval(self, seconds: float) -> None:
+        """Apply the scheduler's interval to the next poll."""
+        self.update_interval = timedelta(seconds=seconds)
+        for update_callback in list(self._schedule_listeners):
+            update_callback()
+
+    @callback
+    def async_add_schedule_listener(
+        self, update_callback: CALLBACK_TYPE
+    ) -> CALLBACK_TYPE:
+        """Listen for poll interval changes, including failed polls.
+
+        Regular listeners are not called again while the controller keeps
+        failing, so the diagnostic interval sensor needs its own hook.
+        """
+        self._schedule_listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._schedule_listeners.remove(update_callback)
+
+        return remove_listener
+
+    def async_add_history_listener(
+        self, update_callback: CALLBACK_TYPE
+    ) -> CALLBACK_TYPE:
+        """Listen for new WAN history samples.
+
+        Rolling figures move with time even when the WAN data does not, and
+        unchanged data does not call the regular listeners.
+        """
+        self._history_listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._history_listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def async_use_fields(self, wan_fields: Iterable[str]) -> CALLBACK_TYPE:
+        """Extract the given WANRecord fields until the returned callback runs.
+
+        Entities register the fields they show when added, so fields that
+        no enabled entity needs are not computed and their changes do not
+        notify listeners. Fields that were not extracted before are filled
+        in right away from the cached gateways, without a controller call.
+        """
+        wan_fields = frozenset(wan_fields) & OPTIONAL_FIELDS
+        self._field_users.update(wan_fields)
+        self._async_update_fields()
+
+        @callback
+        def release_fields() -> None:
+            self._field_users.subtract(wan_fields)
+            self._async_update_fields()
+
+        return release_fields
+
+    @callback
+    def _async_update_fields(self) -> None:
+        """Recompute the fields in use and rebuild the WANs if some were added."""
+        wan_fields = frozenset(+self._field_users)
+        added = wan_fields - self.wan_fields
+        self.wan_fields = wan_fields
+        if added and self.data and not self._rebuild_pending:
+            # Entities are added in batches; rebuild once for all of them
+            self._rebuild_pending = True
+            self.hass.loop.call_soon(self._async_rebuild)
+
+    @callback
+    def _async_rebuild(self) -> None:
+        """Re-extract every WAN from the cached gateway devices."""
+        self._rebuild_pending = False
+        if self.data is None:
+            return
+        rebuilt: dict[str, WANRecord] = {}
+        for site, devices in self._gateway_devices.items():
+            rebuilt.update(
+                self._extract_wan_data(
+                    site, list(devices.values()), self._health_data.get(site, [])
                 )
+            )
+        if rebuilt:
+            self.changes = _diff_wan_data(
+                {wan_id: self.data[wan_id] for wan_id in rebuilt if wan_id in self.data},
+                rebuilt,
+            )
+            self._async_publish({**self.data, **rebuilt})
+
+    @callback
+    def _async_publish(self, data: dict[str, WANRecord]) -> None:
+        """Publish WAN data that did not come from a poll.
+
+        async_set_updated_data would reschedule the next poll, so a steady
+        stream of pushed updates would hold off reconciliation forever.
+        """
+        self.data = data
+        self.async_update_listeners()
+
+    @callback
+    def _async_record_history(self, records: Iterable[WANRecord]) -> None:
+        """Add live WAN records to the history and notify its listeners."""
+        self.history.record(records, time.monotonic())
+        for update_callback in list(self._history_listeners):
+            update_callback()
+
+    async def _fetch_site(self, site: str) -> dict[str, WANRecord]:
+        """Fetch one site, waiting for a free slot in the fan-out.
+
+        Connection errors are retried while the cycle's retry budget lasts,
+        so a struggling controller gets a few retries rather than one per
+        site.
+        """
+        async with self._site_limit:
+            while True:
+                try:
+                    return await self._poll_site(site)
+                except UniFiConnectionError as err:
+                    if self._retry_budget <= 0:
+                        raise
+                    self._retry_budget -= 1
+                    _LOGGER.debug("Retrying site %s: %s", site, err)
+
+    async def _poll_site(self, site: str) -> dict[str, WANRecord]:
+        """Poll a site's health heartbeat, escalating to its device list.
+
+        The device list is fetched when the heartbeat's summary differs from
+        the one of the last device fetch, when device_interval has passed,
+        or when the heartbeat has nothing to go by (it failed, or the
+        controller reports no wan subsystem). Otherwise the site's WANs are
+        kept as they are. When the device list is due whatever the heartbeat
+        says, both requests are sent at the same time.
+        """
+        if self._device_fetch_due(site):
+            heartbeat = asyncio.create_task(self._fetch_health(site))
+            try:
+                fetched = await self._fetch_gateway_devices(site)
+                summary = await heartbeat
+            finally:
+                heartbeat.cancel()
+            return self._update_devices(site, summary, *fetched)
+
+        summary = await self._fetch_health(site)
+        if summary is None or summary != self._device_summaries[site]:
+            fetched = await self._fetch_gateway_devices(site)
+            return self._update_devices(site, summary, *fetched)
+
+        self.metrics.count("heartbeats_only")
+        return {
+            wan_id: wan for wan_id, wan in (self.data or {}).items() if wan.site == site
+        }
+
+    def _device_fetch_due(self, site: str) -> bool:
+        """Return True if the site's device list is due before its heartbeat.
+
+        That is the case before the first device fetch, after a forced
+        refresh, once device_interval or the discovery interval has passed,
+        and when the last heartbeat had no summary to compare.
+        """
+        now = time.monotonic()
+        return (
+            site not in self._device_summaries
+            or self._device_summaries[site] is None
+            or now - self._last_device_fetch[site] >= self.device_interval
+            or not self._gateway_macs.get(site)
+            or now - self._last_discovery[site] >= self.discovery_interval
+        )
+
+    async def async_refresh_devices(self) -> None:
+        """Refresh with a device fetch for every site, changed or not.
+
+        A fetch already in flight may skip the device lists, so it is waited
+        for, and the refresh that follows is not coalesced with it.
+        """
+        if (fetch := self._fetch_task) is not None:
+            await asyncio.wait([fetch])
+        self._device_summaries.clear()
+        self._last_fetch = float("-inf")
+        await self.async_refresh()
+
+    def _update_devices(
+        self,
+        site: str,
+        summary: HealthSummary | None,
+        devices: list[dict[str, Any]] | None,
+        discovered: bool,
+        fingerprint: str,
+    ) -> dict[str, WANRecord]:
+        """Build a site's WANs from a device fetch and its heartbeat.
+
+        ISP names come from the health answer of the cycle's heartbeat. If
+        neither answer changed since the site's WANs were built, they are
+        returned as they are, without decoding or extraction.
+        """
+        self.metrics.count("device_fetches")
+        self._device_summaries[site] = summary
+        self._last_device_fetch[site] = time.monotonic()
+
+        built_from = (fingerprint, self._health_fingerprints.get(site))
+        if devices is None:
+            if self._built_from.get(site) == built_from:
+                # Both answers are the ones the site's WANs were built from
+                self.metrics.count("unchanged_sites")
+                return {
+                    wan_id: wan
+                    for wan_id, wan in (self.data or {}).items()
+                    if wan.site == site
+                }
+            devices = list(self._gateway_devices[site].values())
+
+        with self.metrics.measure("extract"):
+            wan_data = self._extract_wan_data(
+                site, devices, self._health_data.get(site, [])
+            )
+        self.metrics.record_extraction(site, len(wan_data))
+
+        if discovered:
+            self._gateway_macs[site] = {wan.mac for wan in wan_data.values()}
+            if not wan_data:
+                _LOGGER.warning("No WAN interfaces found on any devices of %s", site)
+
+        gateway_macs = self._gateway_macs.get(site, set())
+        self._gateway_devices[site] = {
+            mac: device
+            for device in devices
+            if (mac := device.get("mac")) in gateway_macs
+        }
+        self._device_fingerprints[site] = fingerprint
+        self._built_from[site] = built_from
+
+        return wan_data
+
+    async def _fetch_gateway_devices(
+        self, site: str
+    ) -> tuple[list[dict[str, Any]] | None, bool, str]:
+        """Fetch a site's gateway devices, running a full discovery when needed.
+
+        Return the devices that report a WAN, whether they came from a full
+        discovery and the answer's fingerprint. A targeted poll whose answer
+        is byte for byte the previous one returns None instead of the list,
+        and one that misses one of the known gateways falls back to a full
+        discovery in the same cycle.
+        """
+        now = time.monotonic()
+        gateway_macs = self._gateway_macs.get(site)
+        if (
+            gateway_macs
+            and now - self._last_discovery[site] < self.discovery_interval
+        ):
+            items, fingerprint = await self.client.get_devices_if_changed(
+                site, sorted(gateway_macs), self._device_fingerprints.get(site)
+            )
+            if items is None:
+                return None, False, fingerprint
+            devices = self._scan_devices(site, items)
+            if gateway_macs <= {device.get("mac") for device in devices}:
+                return devices, False, fingerprint
+            _LOGGER.debug("Known gateway missing from poll of %s, rediscovering", site)
+
+        items, fingerprint = await self.client.get_devices_if_changed(site)
+        self._last_discovery[site] = now
+        devices = self._scan_devices(site, items) if items is not None else []
+        return devices, True, fingerprint
+
+    def _scan_devices(
+        self, site: str, items: Iterator[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        """Keep the devices that report a WAN, dropping the others.
+
+        Devices are decoded one at a time as they are scanned, so access
+        points and switches are released right away and memory use does
+        not grow with the size of the site.
+        """
+        devices: list[dict[str, Any]] = []
+        scanned = 0
+        with self.metrics.measure("scan"):
+            for device in items:
+                scanned += 1
+                if _has_wan(device):
+                    devices.append(device)
+        self.metrics.record_scan(site, scanned)
+        return devices
+
+    @callback
+    def async_start_push(self, entry: ConfigEntry) -> None:
+        """Subscribe to every site's event websocket for the entry's lifetime."""
+        for site in self.sites:
+            entry.async_create_background_task(
+                self.hass, self._async_push_loop(site), f"{DOMAIN} websocket {site}"
+            )
+
+    async def _async_push_loop(self, site: str) -> None:
+        """Keep a site's event websocket connected, reconnecting with backoff.
+
+        Errors of any kind lead to a reconnect; only cancellation, when the
+        entry unloads, ends the loop.
+
+        While every site is connected, the scheduler only polls every
+        RECONCILE_INTERVAL to catch anything the event streams missed.
+        """
+        while True:
+            try:
+                await self.client.listen(
+                    site,
+                    partial(self._async_handle_push, site),
+                    partial(self._async_push_connected, site),
+                )
+                _LOGGER.debug("Websocket of %s closed by controller", site)
+            except UniFiError as err:
+                _LOGGER.debug("Websocket error on %s: %s", site, err)
+            except Exception:  # pylint: disable=broad-except
+                # Anything else would end the task and push mode with it
+                _LOGGER.exception("Unexpected websocket error on %s", site)
+
+            if site in self._push_sites:
+                self._push_sites.discard(site)
+                self.scheduler.push = False
+                # Catch up on whatever happened while we were disconnected
+                await self.async_request_refresh()
+
+            delay = self._push_retry_delay.get(site, WS_RECONNECT_MIN)
+            await asyncio.sleep(delay)
+            self._push_retry_delay[site] = min(delay * 2, WS_RECONNECT_MAX)
+
+    @callback
+    def _async_push_connected(self, site: str) -> None:
+        """Demote polling to reconciliation once every websocket is up."""
+        _LOGGER.debug("Websocket of %s connected", site)
+        self._push_sites.add(site)
+        self._push_retry_delay.pop(site, None)
+        self.scheduler.push = self.push_connected
+        # Sync once now; the scheduler then stretches the following polls
+        self.hass.async_create_task(self.async_request_refresh())
+
+    @callback
+    def _async_handle_push(self, site: str, message: dict[str, Any]) -> None:
+        """Apply a site's websocket message to the current WAN data."""
+        kind = message.get("meta", {}).get("message")
+
+        if kind == "events":
+            # Gateway events (WAN transitions, lost contact) may come before
+            # the matching device sync or health change; fetch the devices
+            # so the state follows quickly.
+            if any(
+                str(event.get("key", "")).startswith("EVT_GW_")
+                for event in message.get("data", [])
+            ):
+                self._device_summaries.pop(site, None)
+                self.hass.async_create_task(self.async_request_refresh())
+            return
+
+        if kind in ("device:sync", "device:update"):
+            self._async_apply_devices(site, message.get("data", []))
+
+    async def async_refresh_gateway(self, mac: str) -> bool:
+        """Fetch a single gateway and apply it.
+
+        Return False if the gateway is not one of ours. Concurrent calls for
+        the same gateway share one request.
+        """
+        site = next(
+            (site for site, devices in self._gateway_devices.items() if mac in devices),
+            None,
+        )
+        if site is None:
+            return False
+
+        if (fetch := self._gateway_fetches.get(mac)) is None:
+            self._gateway_fetches[mac] = fetch = self.hass.async_create_task(
+                self._async_fetch_gateway(site, mac), f"{DOMAIN} fetch {mac}"
+            )
+            fetch.add_done_callback(lambda _: self._gateway_fetches.pop(mac, None))
+        await asyncio.shield(fetch)
+        return True
+
+    async def _async_fetch_gateway(self, site: str, mac: str) -> None:
+        """Request one gateway from the controller and apply it."""
+        self._async_apply_devices(site, await self.client.get_devices(site, [mac]))
+
+    @callback
+    def _async_apply_devices(
+        self, site: str, updates: list[dict[str, Any]]
+    ) -> None:
+        """Merge gateway updates into the cache and publish changed WANs.
+
+        Only the WANs of the updated gateways are rebuilt; updates for
+        devices that are not known gateways of the site are ignored.
+        """
+        if self.data is None:
+            return
+
+        gateway_devices = self._gateway_devices.get(site, {})
+        changed: dict[str, WANRecord] = {}
+        for update in updates:
+            device = gateway_devices.get(update.get("mac"))
+            if device is None:
+                continue
+            device.update(update)
+            changed.update(
+                self._extract_wan_data(
+                    site, [device], self._health_data.get(site, [])
+                )
+            )
+
+        if changed:
+            self._async_record_history(changed.values())
+            self.changes = _diff_wan_data(
+                {wan_id: self.data[wan_id] for wan_id in changed if wan_id in self.data},
+                changed,
+            )
+            self._async_publish({**self.data, **changed})
+
+    def _extract_wan_data(
+        self,
+        site: str,
+        devices: list[dict[str, Any]],
+        health_data: list[dict[str, Any]],
+    ) -> dict[str, WANRecord]:
+        """Extract WAN information from a site's device and health lists.
+
+        Only the optional fields in wan_fields are computed; the others are
+        left None. Counters are only fed to the rate tracker while a rate is
+        in use, so a rate that was just enabled starts on the next sample.
+        """
+        wan_fields = self.wan_fields
+        readers = [
+            (name, read) for name, read in _WAN_FIELDS.items() if name in wan_fields
+        ]
+        want_isp = not wan_fields.isdisjoint(("isp_name", "isp_organization"))
+        want_rates = not wan_fields.isdisjoint(RATE_KEYS.values())
+
+        # Extract ISP info from health data
+        health_isp_name = "N/A"
+        health_isp_org = "N/A"
+        
+        for subsystem in health_data if want_isp else ():
+            if subsystem.get("subsystem") == "wan":
+                health_isp_name = subsystem.get("isp_name", "N/A")
+                health_isp_org = subsystem.get("isp_organization", "N/A")
+                break
+
+        # Process devices and extract WAN information
+        wan_data: dict[str, WANRecord] = {}
+        
+        for device in devices:
+            # Look for WAN interfaces
+            wan_keys = [key for key in device.keys() if key.startswith("wan")]
             
-            devices = resp.json().get("data", [])
-            
-            # Fetch health data for ISP info
-            health_data = self._fetch_health()
-            
-            # Extract ISP info from health data
-            health_isp_name = "N/A"
-            health_isp_org = "N/A"
-            
-            for subsystem in health_data:
-                if subsystem.get("subsystem") == "wan":
-                    health_isp_name = subsystem.get("isp_name", "N/A")
-                    health_isp_org = subsystem.get("isp_organization", "N/A")
-                    break
-
-            # Process devices and extract WAN information
-            wan_data = {}
-            
-            for device in devices:
-                # Look for WAN interfaces
-                wan_keys = [key for key in device.keys() if key.startswith("wan")]
+            if wan_keys:
+                device_name = device.get("name", device.get("model", "Unknown"))
+                device_model = device.get("model", "Unknown")
+                device_mac = device.get("mac", "unknown")
+                # Counters are sampled when the gateway last reported in
+                sampled_at = device.get("last_seen") or time.time()
                 
-                if wan_keys:
-                    device_name = device.get("name", device.get("model", "Unknown"))
-                    device_model = device.get("model", "Unknown")
-                    device_mac = device.get("mac", "unknown")
+                for wan_key in wan_keys:
+                    wan_info = device[wan_key]
                     
-                    for wan_key in wan_keys:
-                        wan_info = device[wan_key]
-                        
-                        # Create unique identifier for this WAN
-                        wan_id = f"{device_mac}_{wan_key}"
-                        
+                    # Create unique identifier for this WAN
+                    wan_id = f"{device_mac}_{wan_key}"
+                    is_up = wan_info.get("up", False)
+                    values = {name: read(wan_info) for name, read in readers}
+
+                    if want_isp:
                         # Extract ISP information from device or fallback to health data
                         isp_name = wan_info.get("isp_name") or wan_info.get("ispName") or wan_info.get("provider")
                         isp_org = wan_info.get("isp_organization") or wan_info.get("ispOrganization") or wan_info.get("organization")
-                        
+
                         # If not found in device, use health data (mostly for primary WAN)
                         # We assume the health data corresponds to the active WAN or the first one
-                        if not isp_name and wan_info.get("up", False):
+                        if not isp_name and is_up:
                              isp_name = health_isp_name
                              isp_org = health_isp_org
-                        
-                        if not isp_name:
-                             isp_name = "N/A"
-                        if not isp_org:
-                             isp_org = "N/A"
 
+                        values["isp_name"] = isp_name or "N/A"
+                        values["isp_organization"] = isp_org or "N/A"
+
+                    uptime_seconds = wan_info.get("uptime", 0)
+                    if "uptime" in wan_fields:
                         # Calculate uptime in hours if available
-                        uptime_seconds = wan_info.get("uptime", 0)
-                        uptime_hours = round(uptime_seconds / 3600, 1) if uptime_seconds else 0
-                        
-                        wan_data[wan_id] = {
-                            "name": f"{device_name} {wan_key.upper()}",
-                            "wan_interface": wan_key,
-                            "device_name": device_name,
-                            "device_model": device_model,
-                            "is_up": wan_info.get("up", False),
-                            "ip": wan_info.get("ip", "N/A"),
-                            "gateway": wan_info.get("gateway", "N/A"),
-                            "dns": ", ".join(wan_info.get("dns", [])),
-                            "speed": wan_info.get("speed", 0),
-                            "full_duplex": wan_info.get("full_duplex", False),
-                            "max_speed": wan_info.get("max_speed", 0),
-                            "mac": device.get("mac", "Unknown"),
-                            # ISP Information
-                            "isp_name": isp_name,
-                            "isp_organization": isp_org,
-                            # Connection details
-                            "wan_type": wan_info.get("type", "N/A"),
-                            "netmask": wan_info.get("netmask", "N/A"),
-                            # Statistics
-                            "rx_bytes": wan_info.get("rx_bytes", 0),
-                            "tx_bytes": wan_info.get("tx_bytes", 0),
-                            "rx_packets": wan_info.get("rx_packets", 0),
-                            "tx_packets": wan_info.get("tx_packets", 0),
-                            "uptime": uptime_hours,
-                            "latency": wan_info.get("latency", 0),
-                        }
-            
-            if not wan_data:
-                _LOGGER.warning("No WAN interfaces found on any devices")
-            
-            return wan_data
-            
-        except requests.exceptions.RequestException as err:
-            raise UpdateFailed(f"Error fetching devices: {err}")
+                        values["uptime"] = round(uptime_seconds / 3600, 1) if uptime_seconds else 0
 
-    def _fetch_health(self) -> list[dict[str, Any]]:
-        """Fetch health data from UniFi Controller."""
-        health_url = f"{self.controller}/api/s/{self.site}/stat/health"
-        
+                    # Uptime grows every poll; the connection start only
+                    # moves on reconnect. Round away the sampling jitter.
+                    if "connected_since" in wan_fields and uptime_seconds and is_up:
+                        values["connected_since"] = dt_util.utc_from_timestamp(
+                            round((sampled_at - uptime_seconds) / 60) * 60
+                        )
+
+                    if want_rates:
+                        values.update(self.rates.update(wan_id, wan_info, sampled_at))
+                    
+                    wan_data[wan_id] = WANRecord(
+                        wan_id=wan_id,
+                        wan_interface=wan_key,
+                        device_name=device_name,
+                        device_model=device_model,
+                        mac=device.get("mac", "Unknown"),
+                        site=site,
+                        is_up=is_up,
+                        **values,
+                    )
+
+        return wan_data
+
+    async def _fetch_health(self, site: str) -> HealthSummary | None:
+        """Fetch a site's health data and return its summary.
+
+        Failures are logged, the previous answer is kept for ISP names and
+        None is returned, so the cycle falls back to the device list.
+        """
         try:
-            resp = self.session.get(
-                health_url,
-                verify=self.verify_ssl,
-                timeout=10
+            health_data, self._health_fingerprints[site] = (
+                await self.client.get_health_if_changed(
+                    site, self._health_fingerprints.get(site)
+                )
             )
-            
-            if resp.status_code != 200:
-                _LOGGER.warning(f"Error fetching health data: {resp.status_code}")
-                return []
-            
-            return resp.json().get("data", [])
-            
-        except requests.exceptions.RequestException as err:
-            _LOGGER.warning(f"Error fetching health data: {err}")
-            return []
-
-    async def async_shutdown(self) -> None:
-        """Close the session when shutting down."""
-        if self.session:
-            await self.hass.async_add_executor_job(self.session.close)
+        except UniFiError as err:
+            _LOGGER.warning("Error fetching health data of %s: %s", site, err)
+            return None
+        if health_data is not None:
+            self._health_data[site] = health_data
+            self._health_summaries[site] = HealthSummary.from_health(health_data)
+        return self._health_summaries.get(site)
+
+
+# Optional WANRecord fields read straight from a raw WAN object
+_WAN_FIELDS: dict[str, Callable[[dict[str, Any]], Any]] = {
+    "ip": lambda wan_info: wan_info.get("ip", "N/A"),
+    "gateway": lambda wan_info: wan_info.get("gateway", "N/A"),
+    "dns": lambda wan_info: ", ".join(wan_info.get("dns", [])),
+    "speed": lambda wan_info: wan_info.get("speed", 0),
+    "full_duplex": lambda wan_info: wan_info.get("full_duplex", False),
+    "max_speed": lambda wan_info: wan_info.get("max_speed", 0),
+    "wan_type": lambda wan_info: wan_info.get("type", "N/A"),
+    "netmask": lambda wan_info: wan_info.get("netmask", "N/A"),
+    "rx_bytes": lambda wan_info: wan_info.get("rx_bytes", 0),
+    "tx_bytes": lambda wan_info: wan_info.get("tx_bytes", 0),
+    "rx_packets": lambda wan_info: wan_info.get("rx_packets", 0),
+    "tx_packets": lambda wan_info: wan_info.get("tx_packets", 0),
+    "latency": lambda wan_info: wan_info.get("latency", 0),
+}
+
+
+def _has_wan(device: dict[str, Any]) -> bool:
+    """Return True if the device reports any WAN interface."""
+    return any(key.startswith("wan") for key in device)
+
+
+def _diff_wan_data(
+    old: dict[str, WANRecord], new: dict[str, WANRecord]
+) -> dict[str, frozenset[str]]:
+    """Return the fields that changed per wan_id between two snapshots.
+
+    WANs that appeared or disappeared report all of their fields.
+    """
+    all_fields = frozenset(DATA_FIELDS)
+    changes: dict[str, frozenset[str]] = {}
+    for wan_id, wan in new.items():
+        previous = old.get(wan_id)
+        if previous is None:
+            changes[wan_id] = all_fields
+            continue
+        if keys := wan.changed_fields(previous):
+            changes[wan_id] = keys
+    for wan_id in old.keys() - new.keys():
+        changes[wan_id] = all_fields
+    return changes
@@ -0,0 +1,61 @@
+"""Diagnostics support for UniFi WAN Status."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_CONTROLLER, DOMAIN
+from .coordinator import UniFiWANCoordinator
+
+# Credentials, and the addresses that identify a site on the internet
+TO_REDACT = {
+    CONF_CONTROLLER,
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    "dns",
+    "gateway",
+    "ip",
+    "mac",
+    "wan_id",
+}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return the coordinator state, poll metrics and WAN data of an entry."""
+    coordinator: UniFiWANCoordinator = hass.data[DOMAIN][entry.entry_id]
+    scheduler = coordinator.scheduler
+    return {
+        "entry": async_redact_data(
+            {"data": dict(entry.data), "options": dict(entry.options)}, TO_REDACT
+        ),
+        "coordinator": {
+            "sites": list(coordinator.sites),
+            "interval": scheduler.interval,
+            "reason": scheduler.reason,
+            "consecutive_failures": scheduler.failures,
+            "device_interval": coordinator.device_interval,
+            "wan_fields": sorted(coordinator.wan_fields),
+            "circuit": coordinator.client.breaker.state,
+            "push_connected": coordinator.push_connected,
+            "stale": coordinator.stale,
+            "last_success": (
+                coordinator.last_success.isoformat()
+                if coordinator.last_success
+                else None
+            ),
+        },
+        "metrics": {
+            "coordinator": coordinator.metrics.as_dict(),
+            # Shared with other entries on the same controller account
+            "client": coordinator.client.metrics.as_dict(),
+        },
+        "wans": async_redact_data(
+            [wan.as_dict() for wan in (coordinator.data or {}).values()], TO_REDACT
+        ),
+    }
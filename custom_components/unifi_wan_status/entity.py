@@ -0,0 +1,111 @@
+"""Base entity for UniFi WAN Status."""
+from __future__ import annotations
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DOMAIN
+from .coordinator import UniFiWANCoordinator
+from .models import WANRecord
+
+
+class UniFiWANEntity(CoordinatorEntity[UniFiWANCoordinator]):
+    """Entity tied to one WAN interface of a UniFi gateway.
+
+    State is only written when one of the WANRecord fields in _watched_keys
+    changed in the coordinator's last update, or when availability or
+    staleness flipped. While the entity is added, the coordinator extracts
+    the fields in _used_fields, which are the watched ones by default.
+    """
+
+    _attr_has_entity_name = True
+    _watched_keys: frozenset[str] = frozenset()
+
+    def __init__(self, coordinator: UniFiWANCoordinator, wan_id: str) -> None:
+        """Initialize the entity."""
+        super().__init__(coordinator)
+        self._wan_id = wan_id
+        self._last_status: tuple[bool, bool] | None = None
+        # Looked up once per coordinator update and used by all properties
+        self._record: WANRecord | None = coordinator.data.get(wan_id)
+
+        record = self._record
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, record.mac if record else wan_id)},
+            "name": record.device_name if record else "UniFi Device",
+            "manufacturer": "Ubiquiti",
+            "model": record.device_model if record else "Unknown",
+        }
+        if record:
+            # Gateways are grouped under their site's device
+            self._attr_device_info["via_device"] = coordinator.site_device(record.site)
+
+    @property
+    def _used_fields(self) -> frozenset[str]:
+        """Return the WANRecord fields this entity needs extracted."""
+        return self._watched_keys
+
+    async def async_added_to_hass(self) -> None:
+        """Have the coordinator extract the fields this entity shows."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self.coordinator.async_use_fields(self._used_fields))
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only if something this entity shows has changed."""
+        self._record = self.coordinator.data.get(self._wan_id)
+        status = (self.available, self.coordinator.stale)
+        changed = self.coordinator.changes.get(self._wan_id)
+        if status == self._last_status and not (
+            changed and not changed.isdisjoint(self._watched_keys)
+        ):
+            return
+        self._last_status = status
+        self.async_write_ha_state()
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        return self.coordinator.last_update_success and self._record is not None
+
+
+class UniFiEntryEntity(CoordinatorEntity[UniFiWANCoordinator]):
+    """Entity showing entry-level state on the entry's controller device.
+
+    Poll state moves with every poll, failed ones included, so state is
+    written from the coordinator's schedule listener rather than on data
+    updates, and the entity stays available while the controller fails.
+    """
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, coordinator: UniFiWANCoordinator, entry: ConfigEntry) -> None:
+        """Initialize the entity."""
+        super().__init__(coordinator)
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, entry.entry_id)},
+            name=entry.title,
+            manufacturer="Ubiquiti",
+            model="UniFi Controller",
+            entry_type=DeviceEntryType.SERVICE,
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Follow every poll, including failed ones."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_schedule_listener(self.async_write_ha_state)
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Ignore data updates; the schedule listener already wrote state."""
+
+    @property
+    def available(self) -> bool:
+        """Stay available while backing off from controller errors."""
+        return True
@@ -0,0 +1,209 @@
+"""Rolling availability, flap and latency history per WAN."""
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterable
+import math
+
+from .const import HISTORY_MAX_GAP, HISTORY_SLOT, HISTORY_WINDOWS
+from .models import WANRecord
+
+# Latency histogram bins are 5% wide, from 0 ms up to about 10 seconds
+LATENCY_BINS = 190
+_BIN_SCALE = 1 / math.log1p(0.05)
+_NO_LATENCY = 255
+
+
+def _latency_bin(latency: float) -> int:
+    """Return the histogram bin of a latency in milliseconds."""
+    return min(int(math.log1p(latency) * _BIN_SCALE), LATENCY_BINS - 1)
+
+
+def _bin_latency(index: int) -> float:
+    """Return the latency in the middle of a histogram bin."""
+    return math.expm1((index + 0.5) / _BIN_SCALE)
+
+
+class _Window:
+    """Running totals over the slots of one rolling window."""
+
+    __slots__ = (
+        "seconds",
+        "tail",
+        "size",
+        "observed",
+        "up",
+        "flaps",
+        "latency",
+        "samples",
+    )
+
+    def __init__(self, seconds: int) -> None:
+        """Initialize an empty window."""
+        self.seconds = seconds
+        self.tail = 0
+        self.size = 0
+        self.observed = 0
+        self.up = 0
+        self.flaps = 0
+        self.latency = array("I", [0]) * LATENCY_BINS
+        self.samples = 0
+
+
+class WANHistory:
+    """Fixed-size ring of HISTORY_SLOT long slots for one WAN.
+
+    Each slot holds how long the WAN was observed and up, the number of
+    up/down transitions and one latency sample. Every rolling window keeps
+    running totals and a latency histogram of the slots it covers; slots
+    are added at the head and subtracted as they fall out of a window, so
+    recording a sample is O(1) amortized and a percentile scans a fixed
+    number of histogram bins, however many samples the window holds.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty history."""
+        capacity = max(HISTORY_WINDOWS.values()) // HISTORY_SLOT
+        self._capacity = capacity
+        self._start = array("d", [0.0]) * capacity
+        # Milliseconds, so window totals add and subtract exactly
+        self._observed = array("I", [0]) * capacity
+        self._up = array("I", [0]) * capacity
+        self._flaps = array("H", [0]) * capacity
+        self._latency = array("B", [_NO_LATENCY]) * capacity
+        self._head = -1
+        self._windows = {
+            name: _Window(seconds) for name, seconds in HISTORY_WINDOWS.items()
+        }
+        self._last_at: float | None = None
+        self._last_up: bool | None = None
+
+    def record(self, now: float, is_up: bool, latency: float | None) -> None:
+        """Record the WAN's state as seen at now (monotonic seconds).
+
+        The time since the previous sample is counted in the previous
+        state, up to HISTORY_MAX_GAP; longer gaps are left unobserved.
+        """
+        head = self._head
+        if head < 0 or now - self._start[head] >= HISTORY_SLOT:
+            head = self._open_slot(now)
+        self._evict(now)
+
+        windows = self._windows.values()
+        if self._last_at is not None and self._last_up is not None:
+            elapsed = round(min(now - self._last_at, HISTORY_MAX_GAP) * 1000)
+            if elapsed > 0:
+                up = elapsed if self._last_up else 0
+                self._observed[head] += elapsed
+                self._up[head] += up
+                for window in windows:
+                    window.observed += elapsed
+                    window.up += up
+            if is_up != self._last_up:
+                self._flaps[head] += 1
+                for window in windows:
+                    window.flaps += 1
+
+        # One latency sample per slot; 0 means the gateway has none
+        if is_up and latency and self._latency[head] == _NO_LATENCY:
+            index = self._latency[head] = _latency_bin(latency)
+            for window in windows:
+                window.latency[index] += 1
+                window.samples += 1
+
+        self._last_at = now
+        self._last_up = is_up
+
+    def availability(self, window: str, now: float) -> float | None:
+        """Return the percentage of observed time the WAN was up."""
+        self._evict(now)
+        totals = self._windows[window]
+        if not totals.observed:
+            return None
+        return round(totals.up / totals.observed * 100, 2)
+
+    def flaps(self, window: str, now: float) -> int:
+        """Return the number of up/down transitions."""
+        self._evict(now)
+        return self._windows[window].flaps
+
+    def latency_percentile(
+        self, window: str, percentile: float, now: float
+    ) -> float | None:
+        """Return a latency percentile in milliseconds, within 5%."""
+        self._evict(now)
+        totals = self._windows[window]
+        if not totals.samples:
+            return None
+        rank = math.ceil(totals.samples * percentile / 100)
+        seen = 0
+        for index, count in enumerate(totals.latency):
+            seen += count
+            if seen >= rank:
+                return round(_bin_latency(index), 1)
+        return None
+
+    def _open_slot(self, now: float) -> int:
+        """Start a new head slot, overwriting the oldest one."""
+        head = self._head = (self._head + 1) % self._capacity
+        for window in self._windows.values():
+            if window.size and window.tail == head:
+                # Only reachable if the ring is smaller than the window
+                self._drop_tail(window)
+        self._start[head] = now
+        self._observed[head] = 0
+        self._up[head] = 0
+        self._flaps[head] = 0
+        self._latency[head] = _NO_LATENCY
+        for window in self._windows.values():
+            if not window.size:
+                window.tail = head
+            window.size += 1
+        return head
+
+    def _evict(self, now: float) -> None:
+        """Drop slots that fell out of each window.
+
+        record opens a fresh head slot before evicting, so a slot that is
+        still being filled is never dropped.
+        """
+        for window in self._windows.values():
+            cutoff = now - window.seconds
+            while window.size and self._start[window.tail] < cutoff:
+                self._drop_tail(window)
+
+    def _drop_tail(self, window: _Window) -> None:
+        """Subtract the window's oldest slot from its totals."""
+        tail = window.tail
+        window.observed -= self._observed[tail]
+        window.up -= self._up[tail]
+        window.flaps -= self._flaps[tail]
+        if (index := self._latency[tail]) != _NO_LATENCY:
+            window.latency[index] -= 1
+            window.samples -= 1
+        window.tail = (tail + 1) % self._capacity
+        window.size -= 1
+
+
+class HistoryTracker:
+    """WAN histories of one coordinator, keyed by wan_id."""
+
+    def __init__(self) -> None:
+        """Initialize the tracker."""
+        self._histories: dict[str, WANHistory] = {}
+
+    def get(self, wan_id: str) -> WANHistory | None:
+        """Return the history of a WAN, if it has been seen."""
+        return self._histories.get(wan_id)
+
+    def record(self, records: Iterable[WANRecord], now: float) -> None:
+        """Record the state of the given WANs."""
+        for record in records:
+            if (history := self._histories.get(record.wan_id)) is None:
+                history = self._histories[record.wan_id] = WANHistory()
+            history.record(now, record.is_up, record.latency)
+
+    def prune(self, wan_ids: Iterable[str]) -> None:
+        """Forget WANs that are no longer reported."""
+        for wan_id in self._histories.keys() - set(wan_ids):
+            del self._histories[wan_id]
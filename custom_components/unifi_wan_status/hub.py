@@ -0,0 +1,76 @@
+"""Controller clients shared between UniFi WAN Status config entries."""
+from __future__ import annotations
+
+from functools import partial
+import logging
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.singleton import singleton
+
+from .api import UniFiClient, async_create_session
+from .const import CONF_CONTROLLER, CONF_UNIFI_OS, CONF_VERIFY_SSL, DOMAIN
+from .storage import async_get_session_store
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class UniFiClientPool:
+    """One logged-in client per controller account.
+
+    Entries on the same controller URL and username share a client, and
+    with it one session cookie and one login. The client's session is
+    released once the last entry using it is unloaded.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the pool."""
+        self.hass = hass
+        self._clients: dict[tuple[str, str], UniFiClient] = {}
+        self._users: dict[tuple[str, str], set[str]] = {}
+
+    async def async_acquire(self, entry: ConfigEntry) -> UniFiClient:
+        """Return the client for the entry's controller account."""
+        session_store = await async_get_session_store(self.hass)
+        key = _account(entry.data)
+        if (client := self._clients.get(key)) is None:
+            client = UniFiClient(
+                async_create_session(self.hass, entry.data[CONF_VERIFY_SSL]),
+                entry.data[CONF_CONTROLLER],
+                entry.data[CONF_USERNAME],
+                entry.data[CONF_PASSWORD],
+                unifi_os=entry.data.get(CONF_UNIFI_OS),
+            )
+            # Reuse the last login instead of posting credentials on every
+            # start; a 401 on the first request falls back to a normal login.
+            client.on_login = partial(session_store.async_save, client)
+            if session_store.async_restore(client):
+                _LOGGER.debug("Reusing saved session for %s", client.controller)
+            self._clients[key] = client
+        self._users.setdefault(key, set()).add(entry.entry_id)
+        return client
+
+    @callback
+    def async_release(self, entry: ConfigEntry) -> None:
+        """Stop sharing the client with the entry."""
+        key = _account(entry.data)
+        users = self._users.get(key, set())
+        users.discard(entry.entry_id)
+        if not users and (client := self._clients.pop(key, None)) is not None:
+            del self._users[key]
+            # The connector belongs to Home Assistant's shared session pool
+            client.session.detach()
+
+
+def _account(data: Any) -> tuple[str, str]:
+    """Return the pool key of an entry's controller account."""
+    return data[CONF_CONTROLLER].rstrip("/"), data[CONF_USERNAME]
+
+
+@singleton(f"{DOMAIN}_client_pool")
+@callback
+def async_get_client_pool(hass: HomeAssistant) -> UniFiClientPool:
+    """Return the client pool."""
+    return UniFiClientPool(hass)
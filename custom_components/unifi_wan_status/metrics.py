@@ -0,0 +1,147 @@
+"""Timing and size instrumentation for controller polling."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+import time
+from typing import Any
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with count, mean and max."""
+
+    __slots__ = ("buckets", "count", "total", "max", "last")
+
+    def __init__(self) -> None:
+        """Initialize an empty histogram."""
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def observe(self, milliseconds: float) -> None:
+        """Add one measurement."""
+        self.buckets[bisect_left(LATENCY_BUCKETS, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+        self.max = max(self.max, milliseconds)
+        self.last = milliseconds
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the histogram for diagnostics."""
+        labels = [f"<={bound}" for bound in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}"]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 1) if self.count else None,
+            "max_ms": round(self.max, 1),
+            "last_ms": round(self.last, 1),
+            "buckets": dict(zip(labels, self.buckets)),
+        }
+
+
+class _Metrics:
+    """Phase histograms and counters."""
+
+    def __init__(self) -> None:
+        """Initialize empty metrics."""
+        self.phases: dict[str, LatencyHistogram] = {}
+        self.counters: Counter[str] = Counter()
+
+    def observe(self, phase: str, milliseconds: float) -> None:
+        """Add a measurement to a phase."""
+        if (histogram := self.phases.get(phase)) is None:
+            histogram = self.phases[phase] = LatencyHistogram()
+        histogram.observe(milliseconds)
+
+    @contextmanager
+    def measure(self, phase: str) -> Iterator[None]:
+        """Time the block, whether it succeeds or raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, (time.perf_counter() - start) * 1000)
+
+    def count(self, counter: str, amount: int = 1) -> None:
+        """Increment a counter."""
+        self.counters[counter] += amount
+
+    def last(self, phase: str) -> float | None:
+        """Return the last measurement of a phase in milliseconds."""
+        if (histogram := self.phases.get(phase)) is None:
+            return None
+        return round(histogram.last, 1)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics for diagnostics."""
+        return {
+            "phases": {
+                phase: histogram.as_dict()
+                for phase, histogram in sorted(self.phases.items())
+            },
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+
+class ClientMetrics(_Metrics):
+    """HTTP metrics of a controller client, shared by the entries using it.
+
+    Phases are login, decode and one round trip phase per endpoint (device,
+    health, sites, ...). Counters cover logins, re-logins, responses by
+    status, connection errors and answers skipped as unchanged.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty metrics."""
+        super().__init__()
+        # Endpoint -> bytes of its last answer
+        self.response_bytes: dict[str, int] = {}
+
+    def record_response(self, endpoint: str, status: int, size: int) -> None:
+        """Count a response by status and remember its size."""
+        if status == 401:
+            self.count("http_401")
+        elif status >= 500:
+            self.count("http_5xx")
+        elif status != 200:
+            self.count("http_other")
+        if size:
+            self.response_bytes[endpoint] = size
+            self.count(f"{endpoint}_bytes", size)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics for diagnostics."""
+        return {**super().as_dict(), "last_response_bytes": self.response_bytes}
+
+
+class CoordinatorMetrics(_Metrics):
+    """Poll cycle metrics of a coordinator.
+
+    Phases are the whole cycle, the device list scan and the WAN
+    extraction. Per site, the devices scanned by the last device list scan
+    and the WANs found by the last extraction are kept.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty metrics."""
+        super().__init__()
+        # Site -> devices scanned and WANs found
+        self.sites: dict[str, dict[str, int]] = {}
+
+    def record_scan(self, site: str, devices: int) -> None:
+        """Remember how many devices a site's device list had."""
+        self.sites.setdefault(site, {})["devices_scanned"] = devices
+
+    def record_extraction(self, site: str, wans: int) -> None:
+        """Remember how many WANs were found on a site's gateways."""
+        self.sites.setdefault(site, {})["wans_found"] = wans
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics for diagnostics."""
+        return {**super().as_dict(), "sites": self.sites}
@@ -0,0 +1,181 @@
+"""Data models for UniFi WAN Status."""
+from __future__ import annotations
+
+from dataclasses import MISSING, dataclass, field, fields
+from datetime import datetime
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    ATTR_DEVICE_MODEL,
+    ATTR_DEVICE_NAME,
+    ATTR_DNS,
+    ATTR_FULL_DUPLEX,
+    ATTR_GATEWAY,
+    ATTR_IP_ADDRESS,
+    ATTR_ISP_NAME,
+    ATTR_ISP_ORGANIZATION,
+    ATTR_MAX_SPEED,
+    ATTR_NETMASK,
+    ATTR_SPEED,
+    ATTR_WAN_TYPE,
+)
+
+
+@dataclass(slots=True)
+class WANRecord:
+    """One WAN interface of a UniFi gateway, as of the last update.
+
+    The state, icon and attribute mapping shown by the status sensor are
+    derived once when the record is built and shared by every entity.
+    """
+
+    wan_id: str
+    wan_interface: str
+    device_name: str
+    device_model: str
+    mac: str
+    site: str
+    is_up: bool
+    # Optional fields, only extracted while an enabled entity shows them
+    # and None otherwise
+    ip: str | None = None
+    gateway: str | None = None
+    dns: str | None = None
+    speed: int | None = None
+    full_duplex: bool | None = None
+    max_speed: int | None = None
+    # ISP Information
+    isp_name: str | None = None
+    isp_organization: str | None = None
+    # Connection details
+    wan_type: str | None = None
+    netmask: str | None = None
+    # Statistics
+    rx_bytes: int | None = None
+    tx_bytes: int | None = None
+    rx_packets: int | None = None
+    tx_packets: int | None = None
+    uptime: float | None = None
+    connected_since: datetime | None = None
+    latency: int | None = None
+    rx_rate: float | None = None
+    tx_rate: float | None = None
+    rx_packet_rate: float | None = None
+    tx_packet_rate: float | None = None
+
+    # Derived once per record
+    name: str = field(init=False, compare=False)
+    state: str = field(init=False, compare=False)
+    icon: str = field(init=False, compare=False)
+    attributes: dict[str, Any] = field(init=False, compare=False)
+
+    def __post_init__(self) -> None:
+        """Derive the values shown by the status sensor."""
+        self.name = self.wan_interface.upper()
+        self.state = "Online" if self.is_up else "Offline"
+        self.icon = "mdi:wan" if self.is_up else "mdi:earth-off"
+
+        attrs: dict[str, Any] = {
+            ATTR_DEVICE_NAME: self.device_name,
+            ATTR_DEVICE_MODEL: self.device_model,
+            ATTR_IP_ADDRESS: self.ip,
+            ATTR_GATEWAY: self.gateway,
+            ATTR_DNS: self.dns,
+        }
+        if self.isp_name != "N/A":
+            attrs[ATTR_ISP_NAME] = self.isp_name
+        if self.isp_organization != "N/A":
+            attrs[ATTR_ISP_ORGANIZATION] = self.isp_organization
+        if self.wan_type != "N/A":
+            attrs[ATTR_WAN_TYPE] = self.wan_type
+        if self.netmask != "N/A":
+            attrs[ATTR_NETMASK] = self.netmask
+        if self.speed:
+            attrs[ATTR_SPEED] = self.speed
+        if self.max_speed:
+            attrs[ATTR_MAX_SPEED] = self.max_speed
+        attrs[ATTR_FULL_DUPLEX] = self.full_duplex
+        # Fields that were not extracted are left out
+        self.attributes = {
+            key: value for key, value in attrs.items() if value is not None
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the data fields as JSON serializable values."""
+        data = {name: getattr(self, name) for name in DATA_FIELDS}
+        if self.connected_since is not None:
+            data["connected_since"] = self.connected_since.isoformat()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> WANRecord:
+        """Rebuild a record saved by as_dict."""
+        values = {name: data[name] for name in DATA_FIELDS if name in data}
+        if since := values.get("connected_since"):
+            values["connected_since"] = dt_util.parse_datetime(since)
+        return cls(**values)
+
+    def changed_fields(self, other: WANRecord) -> frozenset[str]:
+        """Return the data fields whose value differs from other."""
+        return frozenset(
+            name for name in DATA_FIELDS if getattr(self, name) != getattr(other, name)
+        )
+
+
+# Fields that come from the controller, as opposed to derived ones
+DATA_FIELDS: tuple[str, ...] = tuple(f.name for f in fields(WANRecord) if f.init)
+
+# Data fields the coordinator only extracts on demand
+OPTIONAL_FIELDS: frozenset[str] = frozenset(
+    f.name for f in fields(WANRecord) if f.init and f.default is not MISSING
+)
+
+
+@dataclass(frozen=True, slots=True)
+class HealthSummary:
+    """The state of a site's WANs as seen in its stat/health answer.
+
+    Summaries only differ when the WAN subsystem, the internet check, the
+    active WAN's address, the gateways or a WAN's up state changed, so the
+    heartbeat can tell when the site's device list is worth fetching.
+    """
+
+    status: str | None
+    internet: str | None
+    wan_ip: str | None
+    gateway: str | None
+    gateways: int
+    gateways_disconnected: int
+    # (interface, up) per WAN, e.g. ("wan2", False)
+    wans: tuple[tuple[str, bool], ...]
+
+    @classmethod
+    def from_health(cls, health_data: list[dict[str, Any]]) -> HealthSummary | None:
+        """Summarize a health list; None if it has no wan subsystem."""
+        subsystems = {
+            subsystem.get("subsystem"): subsystem for subsystem in health_data
+        }
+        if (wan := subsystems.get("wan")) is None:
+            return None
+        # uptime_stats is keyed WAN, WAN2, ...; a WAN is down while any of
+        # its monitors is alerting
+        wans = tuple(
+            sorted(
+                (
+                    "wan1" if name.lower() == "wan" else name.lower(),
+                    not stats.get("alerting_monitors"),
+                )
+                for name, stats in wan.get("uptime_stats", {}).items()
+            )
+        )
+        return cls(
+            status=wan.get("status"),
+            internet=subsystems.get("www", {}).get("status"),
+            wan_ip=wan.get("wan_ip"),
+            gateway=wan.get("gw_mac"),
+            gateways=wan.get("num_gw", 0),
+            gateways_disconnected=wan.get("num_disconnected", 0),
+            wans=wans,
+        )
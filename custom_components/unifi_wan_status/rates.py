@@ -0,0 +1,74 @@
+"""Per-WAN throughput rates computed from cumulative counters."""
+from __future__ import annotations
+
+from typing import Any
+
+from .const import MAX_RATE_GAP
+
+# Counter key in the WAN object -> rate field published next to it
+RATE_KEYS: dict[str, str] = {
+    "rx_bytes": "rx_rate",
+    "tx_bytes": "tx_rate",
+    "rx_packets": "rx_packet_rate",
+    "tx_packets": "tx_packet_rate",
+}
+
+_WRAP_32 = 2**32
+
+
+class RateTracker:
+    """Turn the controller's cumulative WAN counters into per-second rates.
+
+    The previous sample is kept per wan_id. A counter that went backwards
+    is treated as a 32-bit wrap when it was close to the limit, and as a
+    reset (gateway reboot) otherwise; a reset yields no rate for that cycle.
+    Rates are averaged over the real time between samples, so missed polls
+    are handled, but a gap longer than MAX_RATE_GAP starts over. Counters
+    that did not move while time did give a rate of 0, so an idle or down
+    WAN does not keep its last throughput.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the tracker."""
+        self._samples: dict[str, tuple[float, dict[str, int]]] = {}
+        self._rates: dict[str, dict[str, float | None]] = {}
+
+    def update(
+        self, wan_id: str, wan_info: dict[str, Any], sampled_at: float
+    ) -> dict[str, float | None]:
+        """Record the counters of a raw WAN object and return its rates."""
+        counters = {key: int(wan_info.get(key) or 0) for key in RATE_KEYS}
+        previous = self._samples.get(wan_id)
+        empty: dict[str, float | None] = dict.fromkeys(RATE_KEYS.values())
+
+        if previous is None:
+            self._samples[wan_id] = (sampled_at, counters)
+            return self._rates.setdefault(wan_id, empty)
+
+        previous_at, previous_counters = previous
+        elapsed = sampled_at - previous_at
+
+        if elapsed <= 0:
+            # The gateway has not reported in since the last sample; keep
+            # the last rates and the older baseline.
+            return self._rates.get(wan_id, empty)
+
+        self._samples[wan_id] = (sampled_at, counters)
+
+        if elapsed > MAX_RATE_GAP:
+            self._rates[wan_id] = empty
+            return empty
+
+        rates: dict[str, float | None] = {}
+        for counter, rate_key in RATE_KEYS.items():
+            delta = counters[counter] - previous_counters[counter]
+            if delta < 0:
+                if _WRAP_32 * 3 // 4 <= previous_counters[counter] < _WRAP_32:
+                    delta += _WRAP_32
+                else:
+                    rates[rate_key] = None
+                    continue
+            rates[rate_key] = round(delta / elapsed, 2)
+
+        self._rates[wan_id] = rates
+        return rates
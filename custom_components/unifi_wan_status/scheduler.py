@@ -0,0 +1,112 @@
+"""Adaptive poll interval for UniFi WAN Status."""
+from __future__ import annotations
+
+from collections import deque
+import random
+import time
+
+from .const import (
+    BACKOFF_JITTER,
+    BACKOFF_MAX_INTERVAL,
+    DEFAULT_FAST_INTERVAL,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_STABLE_INTERVAL,
+    FLAP_THRESHOLD,
+    FLAP_WINDOW,
+    RECONCILE_INTERVAL,
+    SETTLE_TIME,
+    STABLE_AFTER,
+)
+
+REASON_BACKOFF = "backoff"
+REASON_FAILOVER = "failover"
+REASON_FLAPPING = "flapping"
+REASON_NORMAL = "normal"
+REASON_PUSH = "push"
+REASON_STABLE = "stable"
+REASON_WAN_DOWN = "wan_down"
+
+
+class PollScheduler:
+    """Pick the next poll interval from WAN state and controller health.
+
+    Polls run at the fast interval while a WAN is flapping, was just
+    switched over or went down within the last SETTLE_TIME seconds, relax
+    to the stable interval once every link has stayed unchanged for
+    STABLE_AFTER seconds, and back off exponentially (with jitter) while
+    the controller keeps failing. A WAN that stays down, such as an unused
+    port, does not keep polling fast.
+    """
+
+    def __init__(
+        self,
+        fast_interval: float = DEFAULT_FAST_INTERVAL,
+        normal_interval: float = DEFAULT_SCAN_INTERVAL,
+        stable_interval: float = DEFAULT_STABLE_INTERVAL,
+    ) -> None:
+        """Initialize the scheduler."""
+        self.fast_interval = fast_interval
+        self.normal_interval = normal_interval
+        self.stable_interval = max(stable_interval, normal_interval)
+        self.interval = normal_interval
+        self.reason = REASON_NORMAL
+        self.failures = 0
+        self.push = False
+        self._wan_up: dict[str, bool] = {}
+        self._transitions: dict[str, deque[float]] = {}
+        # Last time each WAN was seen up
+        self._last_up: dict[str, float] = {}
+        self._last_change = time.monotonic()
+
+    def record_success(self, wan_up: dict[str, bool]) -> float:
+        """Record a successful poll and return the next interval."""
+        now = time.monotonic()
+        self.failures = 0
+
+        for wan_id, is_up in wan_up.items():
+            previous = self._wan_up.get(wan_id)
+            if previous is not None and previous != is_up:
+                self._transitions.setdefault(wan_id, deque()).append(now)
+                self._last_change = now
+            if is_up:
+                self._last_up[wan_id] = now
+        self._wan_up = dict(wan_up)
+        for wan_id in self._last_up.keys() - wan_up.keys():
+            del self._last_up[wan_id]
+
+        for transitions in self._transitions.values():
+            while transitions and now - transitions[0] > FLAP_WINDOW:
+                transitions.popleft()
+
+        if self.push:
+            return self._set(RECONCILE_INTERVAL, REASON_PUSH)
+        if any(
+            not is_up
+            and now - self._last_up.get(wan_id, float("-inf")) < SETTLE_TIME
+            for wan_id, is_up in wan_up.items()
+        ):
+            return self._set(self.fast_interval, REASON_WAN_DOWN)
+        if any(len(t) >= FLAP_THRESHOLD for t in self._transitions.values()):
+            return self._set(self.fast_interval, REASON_FLAPPING)
+        if now - self._last_change < SETTLE_TIME:
+            if any(self._transitions.values()):
+                return self._set(self.fast_interval, REASON_FAILOVER)
+            return self._set(self.normal_interval, REASON_NORMAL)
+        if now - self._last_change >= STABLE_AFTER:
+            return self._set(self.stable_interval, REASON_STABLE)
+        return self._set(self.normal_interval, REASON_NORMAL)
+
+    def record_failure(self) -> float:
+        """Record a failed poll and return the backoff interval."""
+        self.failures += 1
+        delay = min(
+            BACKOFF_MAX_INTERVAL, self.normal_interval * 2 ** (self.failures - 1)
+        )
+        delay *= random.uniform(1 - BACKOFF_JITTER, 1 + BACKOFF_JITTER)
+        return self._set(max(delay, self.fast_interval), REASON_BACKOFF)
+
+    def _set(self, interval: float, reason: str) -> float:
+        """Store and return the chosen interval."""
+        self.interval = interval
+        self.reason = reason
+        return interval
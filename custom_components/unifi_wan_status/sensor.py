@@ -1,176 +1,673 @@
 """Sensor platform for UniFi WAN Status."""
 from __future__ import annotations
 
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
 import logging
+import time
 from typing import Any
 
-from homeassistant.components.sensor import SensorEntity, SensorDeviceClass
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    PERCENTAGE,
+    EntityCategory,
+    UnitOfDataRate,
+    UnitOfInformation,
+    UnitOfTime,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.device_registry import DeviceEntryType
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.helpers.typing import StateType
 
 from .const import (
     ATTR_DEVICE_MODEL,
     ATTR_DEVICE_NAME,
     ATTR_DNS,
     ATTR_FULL_DUPLEX,
-    ATTR_GATEWAY,
-    ATTR_IP_ADDRESS,
-    ATTR_ISP_NAME,
-    ATTR_ISP_ORGANIZATION,
-    ATTR_LATENCY,
     ATTR_MAX_SPEED,
     ATTR_NETMASK,
-    ATTR_RX_BYTES,
-    ATTR_RX_PACKETS,
     ATTR_SPEED,
-    ATTR_TX_BYTES,
-    ATTR_TX_PACKETS,
-    ATTR_UPTIME,
-    ATTR_WAN_TYPE,
+    ATTR_STALE,
+    ATTR_STALE_SINCE,
     DOMAIN,
+    DUPLEX_FULL,
+    DUPLEX_HALF,
+    HISTORY_WINDOWS,
+    ORPHAN_GRACE,
 )
 from .coordinator import UniFiWANCoordinator
+from .entity import UniFiEntryEntity, UniFiWANEntity
+from .history import WANHistory
+from .models import WANRecord
 
 _LOGGER = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True, kw_only=True)
+class UniFiWANSensorEntityDescription(SensorEntityDescription):
+    """Describes a per-WAN sensor showing one WANRecord field.
+
+    The description key is also the WANRecord field the sensor shows, so
+    the sensor only writes state when that field changed, and the field is
+    only extracted while the sensor is enabled.
+    """
+
+    value_fn: Callable[[WANRecord], StateType]
+
+
+WAN_METRIC_SENSORS: tuple[UniFiWANSensorEntityDescription, ...] = (
+    UniFiWANSensorEntityDescription(
+        key="rx_rate",
+        name="Download",
+        icon="mdi:download-network",
+        device_class=SensorDeviceClass.DATA_RATE,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfDataRate.BYTES_PER_SECOND,
+        suggested_unit_of_measurement=UnitOfDataRate.MEGABITS_PER_SECOND,
+        suggested_display_precision=2,
+        value_fn=lambda wan: wan.rx_rate,
+    ),
+    UniFiWANSensorEntityDescription(
+        key="tx_rate",
+        name="Upload",
+        icon="mdi:upload-network",
+        device_class=SensorDeviceClass.DATA_RATE,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfDataRate.BYTES_PER_SECOND,
+        suggested_unit_of_measurement=UnitOfDataRate.MEGABITS_PER_SECOND,
+        suggested_display_precision=2,
+        value_fn=lambda wan: wan.tx_rate,
+    ),
+    UniFiWANSensorEntityDescription(
+        key="rx_packet_rate",
+        name="Download packets",
+        icon="mdi:download-network-outline",
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement="packets/s",
+        suggested_display_precision=1,
+        entity_registry_enabled_default=False,
+        value_fn=lambda wan: wan.rx_packet_rate,
+    ),
+    UniFiWANSensorEntityDescription(
+        key="tx_packet_rate",
+        name="Upload packets",
+        icon="mdi:upload-network-outline",
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement="packets/s",
+        suggested_display_precision=1,
+        entity_registry_enabled_default=False,
+        value_fn=lambda wan: wan.tx_packet_rate,
+    ),
+    UniFiWANSensorEntityDescription(
+        key="rx_bytes",
+        name="Downloaded",
+        icon="mdi:download",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        suggested_unit_of_measurement=UnitOfInformation.GIBIBYTES,
+        suggested_display_precision=2,
+        value_fn=lambda wan: wan.rx_bytes,
+    ),
+    UniFiWANSensorEntityDescription(
+        key="tx_bytes",
+        name="Uploaded",
+        icon="mdi:upload",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        suggested_unit_of_measurement=UnitOfInformation.GIBIBYTES,
+        suggested_display_precision=2,
+        value_fn=lambda wan: wan.tx_bytes,
+    ),
+    UniFiWANSensorEntityDescription(
+        key="rx_packets",
+        name="Packets received",
+        icon="mdi:download",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement="packets",
+        entity_registry_enabled_default=False,
+        value_fn=lambda wan: wan.rx_packets,
+    ),
+    UniFiWANSensorEntityDescription(
+        key="tx_packets",
+        name="Packets sent",
+        icon="mdi:upload",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement="packets",
+        entity_registry_enabled_default=False,
+        value_fn=lambda wan: wan.tx_packets,
+    ),
+    UniFiWANSensorEntityDescription(
+        key="uptime",
+        name="Uptime",
+        icon="mdi:timer-outline",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.HOURS,
+        suggested_display_precision=1,
+        # Changes on every poll; "Connected since" carries the same
+        # information and only changes on reconnect.
+        entity_registry_enabled_default=False,
+        value_fn=lambda wan: wan.uptime,
+    ),
+    UniFiWANSensorEntityDescription(
+        key="connected_since",
+        name="Connected since",
+        icon="mdi:clock-start",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        value_fn=lambda wan: wan.connected_since,
+    ),
+    UniFiWANSensorEntityDescription(
+        key="latency",
+        name="Latency",
+        icon="mdi:speedometer",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        value_fn=lambda wan: wan.latency,
+    ),
+    UniFiWANSensorEntityDescription(
+        key="ip",
+        name="IP address",
+        icon="mdi:ip-network",
+        value_fn=lambda wan: wan.ip,
+    ),
+    UniFiWANSensorEntityDescription(
+        key="gateway",
+        name="Gateway",
+        icon="mdi:router-network",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda wan: wan.gateway,
+    ),
+    UniFiWANSensorEntityDescription(
+        key="dns",
+        name="DNS servers",
+        icon="mdi:dns",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda wan: wan.dns,
+    ),
+    UniFiWANSensorEntityDescription(
+        key="speed",
+        name="Link speed",
+        icon="mdi:ethernet",
+        device_class=SensorDeviceClass.DATA_RATE,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfDataRate.MEGABITS_PER_SECOND,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        # The controller reports 0 while there is no link
+        value_fn=lambda wan: wan.speed or None,
+    ),
+    UniFiWANSensorEntityDescription(
+        key="full_duplex",
+        name="Duplex",
+        icon="mdi:swap-horizontal",
+        device_class=SensorDeviceClass.ENUM,
+        options=[DUPLEX_FULL, DUPLEX_HALF],
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda wan: (
+            None
+            if wan.full_duplex is None
+            else DUPLEX_FULL if wan.full_duplex else DUPLEX_HALF
+        ),
+    ),
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class UniFiWANHistorySensorEntityDescription(SensorEntityDescription):
+    """Describes a rolling per-WAN figure computed from the WAN history.
+
+    value_fn gets the WAN's history and the current monotonic time; fields
+    are the WANRecord fields the history needs extracted for it.
+    """
+
+    value_fn: Callable[[WANHistory, float], StateType]
+    fields: frozenset[str] = frozenset()
+
+
+# Percentiles cover the last 24 hours
+LATENCY_PERCENTILE_WINDOW = "24h"
+
+WAN_HISTORY_SENSORS: tuple[UniFiWANHistorySensorEntityDescription, ...] = (
+    *(
+        UniFiWANHistorySensorEntityDescription(
+            key=f"availability_{window}",
+            name=f"Availability {window}",
+            icon="mdi:percent-circle-outline",
+            state_class=SensorStateClass.MEASUREMENT,
+            native_unit_of_measurement=PERCENTAGE,
+            suggested_display_precision=2,
+            entity_registry_enabled_default=window == "24h",
+            value_fn=lambda history, now, window=window: history.availability(
+                window, now
+            ),
+        )
+        for window in HISTORY_WINDOWS
+    ),
+    *(
+        UniFiWANHistorySensorEntityDescription(
+            key=f"flaps_{window}",
+            name=f"Flaps {window}",
+            icon="mdi:swap-vertical",
+            state_class=SensorStateClass.MEASUREMENT,
+            entity_registry_enabled_default=window == "24h",
+            value_fn=lambda history, now, window=window: history.flaps(window, now),
+        )
+        for window in HISTORY_WINDOWS
+    ),
+    *(
+        UniFiWANHistorySensorEntityDescription(
+            key=f"latency_p{percentile}",
+            name=f"Latency p{percentile}",
+            icon="mdi:speedometer",
+            device_class=SensorDeviceClass.DURATION,
+            state_class=SensorStateClass.MEASUREMENT,
+            native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+            suggested_display_precision=0,
+            entity_registry_enabled_default=percentile == 95,
+            fields=frozenset({"latency"}),
+            value_fn=lambda history, now, percentile=percentile: (
+                history.latency_percentile(
+                    LATENCY_PERCENTILE_WINDOW, percentile, now
+                )
+            ),
+        )
+        for percentile in (50, 95, 99)
+    ),
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class UniFiPollMetricSensorEntityDescription(SensorEntityDescription):
+    """Describes an entry-level figure taken from the poll metrics."""
+
+    value_fn: Callable[[UniFiWANCoordinator], StateType]
+
+
+def _controller_errors(coordinator: UniFiWANCoordinator) -> int:
+    """Return the 401, 5xx and connection errors seen from the controller."""
+    counters = coordinator.client.metrics.counters
+    return counters["http_401"] + counters["http_5xx"] + counters["connection_errors"]
+
+
+# Off by default; meant for tracking down slow controllers
+POLL_METRIC_SENSORS: tuple[UniFiPollMetricSensorEntityDescription, ...] = (
+    UniFiPollMetricSensorEntityDescription(
+        key="poll_duration",
+        name="Poll duration",
+        icon="mdi:timer-outline",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        suggested_display_precision=0,
+        value_fn=lambda coordinator: coordinator.metrics.last("cycle"),
+    ),
+    UniFiPollMetricSensorEntityDescription(
+        key="device_response_size",
+        name="Device response size",
+        icon="mdi:file-download-outline",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        suggested_unit_of_measurement=UnitOfInformation.KILOBYTES,
+        suggested_display_precision=1,
+        value_fn=lambda coordinator: (
+            coordinator.client.metrics.response_bytes.get("device")
+        ),
+    ),
+    UniFiPollMetricSensorEntityDescription(
+        key="relogins",
+        name="Re-logins",
+        icon="mdi:login-variant",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda coordinator: coordinator.client.metrics.counters["relogins"],
+    ),
+    UniFiPollMetricSensorEntityDescription(
+        key="controller_errors",
+        name="Controller errors",
+        icon="mdi:alert-circle-outline",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=_controller_errors,
+    ),
+)
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
-    """Set up UniFi WAN Status sensors based on a config entry."""
+    """Set up UniFi WAN Status sensors based on a config entry.
+
+    WANs that appear in a later update get their sensors added. The
+    sensors of WANs that have been missing from every successful update for
+    ORPHAN_GRACE seconds are removed, without reloading the entry, so a
+    device list that briefly leaves out a gateway does not delete its
+    entities and their history.
+    """
     coordinator: UniFiWANCoordinator = hass.data[DOMAIN][entry.entry_id]
+    known_wans: set[str] = set()
+    # Last time each WAN was part of a successful update. Registry entries of
+    # WANs missing from it, e.g. removed while Home Assistant was not
+    # running, are removed once ORPHAN_GRACE has passed since setup.
+    last_seen: dict[str, float] = {}
+    started = time.monotonic()
+    startup_cleanup = True
+
+    @callback
+    def async_update_wans() -> None:
+        """Add and remove WAN sensors to match the coordinator's data."""
+        nonlocal startup_cleanup
+        current = set(coordinator.data)
+        if new_wans := current - known_wans:
+            async_add_entities(_wan_entities(coordinator, new_wans))
+            known_wans.update(new_wans)
+        if not coordinator.last_update_success:
+            return
+        now = time.monotonic()
+        for wan_id in current:
+            last_seen[wan_id] = now
+        expired = [
+            wan_id
+            for wan_id, seen in last_seen.items()
+            if now - seen >= ORPHAN_GRACE
+        ]
+        if expired or (startup_cleanup and now - started >= ORPHAN_GRACE):
+            for wan_id in expired:
+                del last_seen[wan_id]
+                known_wans.discard(wan_id)
+            startup_cleanup = False
+            _async_remove_orphans(hass, entry, set(last_seen))
+
+    async_update_wans()
+    async_add_entities(
+        [
+            UniFiPollIntervalSensor(coordinator, entry),
+            *(
+                UniFiPollMetricSensor(coordinator, entry, description)
+                for description in POLL_METRIC_SENSORS
+            ),
+        ]
+    )
+    entry.async_on_unload(coordinator.async_add_listener(async_update_wans))
+
 
-    # Create a sensor for each WAN interface found
-    entities = []
-    for wan_id in coordinator.data:
+def _wan_entities(
+    coordinator: UniFiWANCoordinator, wan_ids: Iterable[str]
+) -> list[SensorEntity]:
+    """Return the status and metric sensors of the given WANs."""
+    entities: list[SensorEntity] = []
+    for wan_id in wan_ids:
         entities.append(UniFiWANSensor(coordinator, wan_id))
+        entities.extend(
+            UniFiWANMetricSensor(coordinator, wan_id, description)
+            for description in WAN_METRIC_SENSORS
+        )
+        entities.extend(
+            UniFiWANHistorySensor(coordinator, wan_id, description)
+            for description in WAN_HISTORY_SENSORS
+        )
+    return entities
 
-    async_add_entities(entities)
 
+@callback
+def _async_remove_orphans(
+    hass: HomeAssistant, entry: ConfigEntry, wan_ids: set[str]
+) -> None:
+    """Remove registry entries and devices of WANs that no longer exist."""
+    active = {f"{DOMAIN}_{wan_id}" for wan_id in wan_ids}
+    active.update(
+        f"{DOMAIN}_{wan_id}_{description.key}"
+        for wan_id in wan_ids
+        for description in (*WAN_METRIC_SENSORS, *WAN_HISTORY_SENSORS)
+    )
+    # Entry-level entities (diagnostics) are never orphans
+    entry_prefix = f"{DOMAIN}_{entry.entry_id}_"
+
+    entity_registry = er.async_get(hass)
+    for entity_entry in er.async_entries_for_config_entry(
+        entity_registry, entry.entry_id
+    ):
+        if entity_entry.unique_id in active or entity_entry.unique_id.startswith(
+            entry_prefix
+        ):
+            continue
+        _LOGGER.info("Removing orphaned entity: %s", entity_entry.entity_id)
+        entity_registry.async_remove(entity_entry.entity_id)
+
+    # Gateways left without any WAN entity; the controller and site
+    # devices have no entities of their own
+    device_registry = dr.async_get(hass)
+    for device in dr.async_entries_for_config_entry(device_registry, entry.entry_id):
+        if device.entry_type is not DeviceEntryType.SERVICE and not (
+            er.async_entries_for_device(
+                entity_registry, device.id, include_disabled_entities=True
+            )
+        ):
+            _LOGGER.info("Removing orphaned device: %s", device.name)
+            device_registry.async_update_device(
+                device.id, remove_config_entry_id=entry.entry_id
+            )
 
-class UniFiWANSensor(CoordinatorEntity[UniFiWANCoordinator], SensorEntity):
+
+class UniFiWANSensor(UniFiWANEntity, SensorEntity):
     """Representation of a UniFi WAN Status sensor."""
 
+    # Counters, uptime and latency change on every poll and have their own
+    # sensors, so they do not make this sensor rewrite its attributes.
+    # Only the identity fields (IP, gateway, ISP, type) are recorded; the
+    # rest is still shown but kept out of the recorder's attribute rows.
+    _unrecorded_attributes = frozenset(
+        {
+            ATTR_DEVICE_NAME,
+            ATTR_DEVICE_MODEL,
+            ATTR_DNS,
+            ATTR_NETMASK,
+            ATTR_SPEED,
+            ATTR_MAX_SPEED,
+            ATTR_FULL_DUPLEX,
+            ATTR_STALE,
+            ATTR_STALE_SINCE,
+        }
+    )
+    _watched_keys = frozenset(
+        {
+            "wan_interface",
+            "device_name",
+            "device_model",
+            "is_up",
+            "ip",
+            "gateway",
+            "dns",
+            "speed",
+            "full_duplex",
+            "max_speed",
+            "isp_name",
+            "isp_organization",
+            "wan_type",
+            "netmask",
+        }
+    )
+
     def __init__(self, coordinator: UniFiWANCoordinator, wan_id: str) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._wan_id = wan_id
-        self._attr_has_entity_name = True
+        super().__init__(coordinator, wan_id)
 
-        # Get initial data
-        wan_data = coordinator.data.get(wan_id, {})
-        
         # Set unique ID
         self._attr_unique_id = f"{DOMAIN}_{wan_id}"
-        
-        # Set device info for grouping
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, wan_data.get("mac", wan_id))},
-            "name": wan_data.get("device_name", "UniFi Device"),
-            "manufacturer": "Ubiquiti",
-            "model": wan_data.get("device_model", "Unknown"),
-        }
 
     @property
     def name(self) -> str:
         """Return the name of the sensor."""
-        wan_data = self.coordinator.data.get(self._wan_id, {})
-        return wan_data.get("wan_interface", "WAN").upper()
+        return self._record.name if self._record else "WAN"
 
     @property
-    def native_value(self) -> str:
+    def native_value(self) -> str | None:
         """Return the state of the sensor."""
-        wan_data = self.coordinator.data.get(self._wan_id, {})
-        return "Online" if wan_data.get("is_up", False) else "Offline"
+        return self._record.state if self._record else None
 
     @property
     def icon(self) -> str:
         """Return the icon to use in the frontend."""
-        wan_data = self.coordinator.data.get(self._wan_id, {})
-        if wan_data.get("is_up", False):
-            return "mdi:wan"
-        return "mdi:earth-off"
+        return self._record.icon if self._record else "mdi:earth-off"
 
     @property
-    def extra_state_attributes(self) -> dict[str, Any]:
+    def extra_state_attributes(self) -> dict[str, Any] | None:
         """Return the state attributes."""
-        wan_data = self.coordinator.data.get(self._wan_id, {})
-        
-        attrs = {
-            ATTR_DEVICE_NAME: wan_data.get("device_name", "Unknown"),
-            ATTR_DEVICE_MODEL: wan_data.get("device_model", "Unknown"),
-            ATTR_IP_ADDRESS: wan_data.get("ip", "N/A"),
-            ATTR_GATEWAY: wan_data.get("gateway", "N/A"),
-            ATTR_DNS: wan_data.get("dns", "N/A"),
+        if self._record is None:
+            return None
+        if not self.coordinator.stale:
+            return self._record.attributes
+        # Restored at startup, or the controller stopped answering. The time
+        # of the last good update is shown rather than a ticking age, so a
+        # stale entity is not rewritten on every failed poll.
+        attributes = {**self._record.attributes, ATTR_STALE: True}
+        if (last_success := self.coordinator.last_success) is not None:
+            attributes[ATTR_STALE_SINCE] = last_success
+        return attributes
+
+
+class UniFiWANMetricSensor(UniFiWANEntity, SensorEntity):
+    """Numeric metric of a UniFi WAN interface."""
+
+    entity_description: UniFiWANSensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: UniFiWANCoordinator,
+        wan_id: str,
+        description: UniFiWANSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, wan_id)
+        self.entity_description = description
+        self._watched_keys = frozenset({description.key})
+
+        wan_interface = self._record.name if self._record else "WAN"
+
+        self._attr_unique_id = f"{DOMAIN}_{wan_id}_{description.key}"
+        self._attr_name = f"{wan_interface} {description.name}"
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the metric value."""
+        if self._record is None:
+            return None
+        return self.entity_description.value_fn(self._record)
+
+
+class UniFiWANHistorySensor(UniFiWANEntity, SensorEntity):
+    """Rolling availability, flap count or latency percentile of a WAN.
+
+    The value comes from the coordinator's WAN history rather than the WAN
+    record, so it is recomputed on every new history sample and written
+    only when it changed.
+    """
+
+    entity_description: UniFiWANHistorySensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: UniFiWANCoordinator,
+        wan_id: str,
+        description: UniFiWANHistorySensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, wan_id)
+        self.entity_description = description
+
+        wan_interface = self._record.name if self._record else "WAN"
+
+        self._attr_unique_id = f"{DOMAIN}_{wan_id}_{description.key}"
+        self._attr_name = f"{wan_interface} {description.name}"
+        self._attr_native_value = self._history_value()
+
+    @property
+    def _used_fields(self) -> frozenset[str]:
+        """Return the WANRecord fields the history needs for this sensor."""
+        return self.entity_description.fields
+
+    async def async_added_to_hass(self) -> None:
+        """Follow the WAN history as well as the coordinator."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_history_listener(self._handle_history_update)
+        )
+
+    @callback
+    def _handle_history_update(self) -> None:
+        """Write state if the rolling value changed."""
+        if (value := self._history_value()) != self._attr_native_value:
+            self._attr_native_value = value
+            self.async_write_ha_state()
+
+    def _history_value(self) -> StateType:
+        """Return the current value from the WAN's history."""
+        if (history := self.coordinator.history.get(self._wan_id)) is None:
+            return None
+        return self.entity_description.value_fn(history, time.monotonic())
+
+
+class UniFiPollIntervalSensor(UniFiEntryEntity, SensorEntity):
+    """Diagnostic sensor showing the current adaptive poll interval."""
+
+    _attr_name = "Poll interval"
+    _attr_icon = "mdi:timer-sync-outline"
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _unrecorded_attributes = frozenset({"consecutive_failures", "circuit"})
+
+    def __init__(self, coordinator: UniFiWANCoordinator, entry: ConfigEntry) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, entry)
+        self._attr_unique_id = f"{DOMAIN}_{entry.entry_id}_poll_interval"
+
+    @property
+    def native_value(self) -> int:
+        """Return the interval until the next poll."""
+        return round(self.coordinator.scheduler.interval)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return why this interval was chosen."""
+        return {
+            "reason": self.coordinator.scheduler.reason,
+            "consecutive_failures": self.coordinator.scheduler.failures,
+            "circuit": self.coordinator.client.breaker.state,
         }
-        
-        # ISP Information
-        isp_name = wan_data.get("isp_name", "N/A")
-        isp_org = wan_data.get("isp_organization", "N/A")
-        
-        if isp_name != "N/A":
-            attrs[ATTR_ISP_NAME] = isp_name
-        
-        if isp_org != "N/A":
-            attrs[ATTR_ISP_ORGANIZATION] = isp_org
-        
-        # Connection type and network info
-        if wan_data.get("wan_type") != "N/A":
-            attrs[ATTR_WAN_TYPE] = wan_data["wan_type"]
-        
-        if wan_data.get("netmask") != "N/A":
-            attrs[ATTR_NETMASK] = wan_data["netmask"]
-        
-        # Speed info
-        if wan_data.get("speed"):
-            attrs[ATTR_SPEED] = wan_data["speed"]
-        
-        if wan_data.get("max_speed"):
-            attrs[ATTR_MAX_SPEED] = wan_data["max_speed"]
-        
-        if "full_duplex" in wan_data:
-            attrs[ATTR_FULL_DUPLEX] = wan_data["full_duplex"]
-        
-        # Statistics
-        rx_bytes = wan_data.get("rx_bytes", 0)
-        tx_bytes = wan_data.get("tx_bytes", 0)
-        
-        if rx_bytes:
-            attrs[ATTR_RX_BYTES] = self._format_bytes(rx_bytes)
-            
-        if tx_bytes:
-            attrs[ATTR_TX_BYTES] = self._format_bytes(tx_bytes)
-        
-        if wan_data.get("rx_packets"):
-            attrs[ATTR_RX_PACKETS] = wan_data["rx_packets"]
-        
-        if wan_data.get("tx_packets"):
-            attrs[ATTR_TX_PACKETS] = wan_data["tx_packets"]
-        
-        # Uptime
-        uptime = wan_data.get("uptime", 0)
-        if uptime:
-            attrs[ATTR_UPTIME] = f"{uptime} hours"
-        
-        # Latency
-        if wan_data.get("latency"):
-            attrs[ATTR_LATENCY] = f"{wan_data['latency']} ms"
-        
-        return attrs
-    
-    def _format_bytes(self, bytes_value: int) -> str:
-        """Format bytes to human readable format."""
-        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-            if bytes_value < 1024.0:
-                return f"{bytes_value:.2f} {unit}"
-            bytes_value /= 1024.0
-        return f"{bytes_value:.2f} PB"
+
+
+class UniFiPollMetricSensor(UniFiEntryEntity, SensorEntity):
+    """Diagnostic sensor showing one poll metric of the entry."""
+
+    entity_description: UniFiPollMetricSensorEntityDescription
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(
+        self,
+        coordinator: UniFiWANCoordinator,
+        entry: ConfigEntry,
+        description: UniFiPollMetricSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, entry)
+        self.entity_description = description
+        self._attr_unique_id = f"{DOMAIN}_{entry.entry_id}_{description.key}"
 
     @property
-    def available(self) -> bool:
-        """Return if entity is available."""
-        return self.coordinator.last_update_success and self._wan_id in self.coordinator.data
+    def native_value(self) -> StateType:
+        """Return the metric."""
+        return self.entity_description.value_fn(self.coordinator)
@@ -0,0 +1,224 @@
+"""Long-term statistics imported from UniFi gateway reports."""
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import logging
+from typing import Any
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import UnitOfDataRate, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util import dt as dt_util, slugify
+
+from .api import UniFiError
+from .breaker import STATE_OPEN
+from .const import (
+    DOMAIN,
+    STATISTICS_BACKFILL,
+    STATISTICS_BATCH,
+    STATISTICS_IMPORT_INTERVAL,
+    STATISTICS_RETENTION,
+)
+from .coordinator import UniFiWANCoordinator
+from .models import WANRecord
+from .storage import UniFiStatisticsStore
+
+_LOGGER = logging.getLogger(__name__)
+
+HOUR = timedelta(hours=1)
+
+
+@dataclass(frozen=True, slots=True)
+class ReportMetric:
+    """A per-WAN value of the hourly gateway report."""
+
+    attr: str
+    key: str
+    name: str
+    unit: str
+    convert: Callable[[float], float]
+
+
+REPORT_METRICS: tuple[ReportMetric, ...] = (
+    # Bytes transferred in the hour, imported as the mean rate
+    ReportMetric(
+        "rx_bytes",
+        "rx_rate",
+        "Download",
+        UnitOfDataRate.BYTES_PER_SECOND,
+        lambda value: round(value / 3600, 2),
+    ),
+    ReportMetric(
+        "tx_bytes",
+        "tx_rate",
+        "Upload",
+        UnitOfDataRate.BYTES_PER_SECOND,
+        lambda value: round(value / 3600, 2),
+    ),
+    ReportMetric(
+        "latency", "latency", "Latency", UnitOfTime.MILLISECONDS, float
+    ),
+)
+
+
+class UniFiStatisticsImporter:
+    """Import the controller's hourly gateway reports as external statistics.
+
+    Throughput and latency history then survives restarts and controller
+    outages without keeping every polled state in the recorder. Each
+    gateway is imported from a stored high-water mark in STATISTICS_BATCH
+    sized requests, so a gap is backfilled on the next run. The mark is the
+    hour after the last one the controller returned: it builds an hour's
+    row a few minutes after the hour ends, and an hour asked for too early
+    is asked for again on the next run. Only complete hours are imported,
+    and the first run goes back STATISTICS_BACKFILL.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, entry: ConfigEntry, coordinator: UniFiWANCoordinator
+    ) -> None:
+        """Initialize the importer."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self._store = UniFiStatisticsStore(hass, entry.entry_id)
+        # "site/mac" -> first hour not yet imported, in epoch milliseconds
+        self._imported: dict[str, int] = {}
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    @callback
+    def async_start(self, entry: ConfigEntry) -> None:
+        """Import now and then every STATISTICS_IMPORT_INTERVAL."""
+        entry.async_create_background_task(
+            self.hass, self.async_import(), f"{DOMAIN} statistics import"
+        )
+        entry.async_on_unload(
+            async_track_time_interval(
+                self.hass,
+                self._async_scheduled_import,
+                timedelta(seconds=STATISTICS_IMPORT_INTERVAL),
+                name=f"{DOMAIN} statistics import",
+            )
+        )
+
+    async def _async_scheduled_import(self, now: datetime) -> None:
+        """Run the periodic import."""
+        await self.async_import()
+
+    async def async_import(self) -> None:
+        """Import the complete hours reported since the last import."""
+        async with self._lock:
+            if not self._loaded:
+                self._imported = await self._store.async_load()
+                self._loaded = True
+            if (
+                not self.coordinator.data
+                or self.coordinator.client.breaker.state == STATE_OPEN
+            ):
+                return
+
+            end = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+            for (site, mac), wans in _gateways(self.coordinator.data).items():
+                try:
+                    await self._async_import_gateway(site, mac, wans, end)
+                except UniFiError as err:
+                    _LOGGER.warning("Error importing reports of %s: %s", mac, err)
+
+            await self._store.async_save(self._imported)
+
+    async def _async_import_gateway(
+        self, site: str, mac: str, wans: list[WANRecord], end: datetime
+    ) -> None:
+        """Import one gateway's reports up to end, a batch at a time."""
+        key = f"{site}/{mac}"
+        start = end - timedelta(seconds=STATISTICS_BACKFILL)
+        if (imported := self._imported.get(key)) is not None:
+            start = max(start, dt_util.utc_from_timestamp(imported / 1000))
+
+        attrs = [
+            f"{_report_prefix(wan.wan_interface)}-{metric.attr}"
+            for wan in wans
+            for metric in REPORT_METRICS
+        ]
+        retained_from = end - timedelta(seconds=STATISTICS_RETENTION)
+        while start < end:
+            batch_end = min(start + timedelta(seconds=STATISTICS_BATCH), end)
+            rows = await self.coordinator.client.get_gateway_report(
+                site, mac, start, batch_end, attrs
+            )
+            if (
+                last_hour := self._async_add_statistics(wans, rows, start, batch_end)
+            ) is not None:
+                self._imported[key] = int((last_hour + HOUR).timestamp() * 1000)
+            elif batch_end <= retained_from:
+                # The controller no longer keeps these hours; nothing will come
+                self._imported[key] = int(batch_end.timestamp() * 1000)
+            start = batch_end
+
+    @callback
+    def _async_add_statistics(
+        self,
+        wans: list[WANRecord],
+        rows: list[dict[str, Any]],
+        start: datetime,
+        end: datetime,
+    ) -> datetime | None:
+        """Queue one batch of report rows for every WAN metric.
+
+        Return the last hour of the batch that had a row, if any.
+        """
+        hours: list[tuple[datetime, dict[str, Any]]] = []
+        for row in rows:
+            hour = dt_util.utc_from_timestamp(row.get("time", 0) / 1000)
+            # Statistics are hourly; skip anything outside the batch
+            if start <= hour < end and hour.minute == hour.second == 0:
+                hours.append((hour, row))
+
+        for wan in wans:
+            prefix = _report_prefix(wan.wan_interface)
+            for metric in REPORT_METRICS:
+                attr = f"{prefix}-{metric.attr}"
+                statistics: list[StatisticData] = []
+                for hour, row in hours:
+                    if (raw := row.get(attr)) is None:
+                        continue
+                    value = metric.convert(raw)
+                    statistics.append(
+                        StatisticData(start=hour, mean=value, min=value, max=value)
+                    )
+                if not statistics:
+                    continue
+                async_add_external_statistics(
+                    self.hass,
+                    StatisticMetaData(
+                        has_mean=True,
+                        has_sum=False,
+                        name=f"{wan.device_name} {wan.wan_interface} {metric.name}",
+                        source=DOMAIN,
+                        statistic_id=f"{DOMAIN}:{slugify(f'{wan.wan_id}_{metric.key}')}",
+                        unit_of_measurement=metric.unit,
+                    ),
+                    statistics,
+                )
+
+        return max((hour for hour, _ in hours), default=None)
+
+
+def _gateways(data: dict[str, WANRecord]) -> dict[tuple[str, str], list[WANRecord]]:
+    """Group WANs by site and gateway MAC."""
+    gateways: dict[tuple[str, str], list[WANRecord]] = defaultdict(list)
+    for wan in data.values():
+        gateways[(wan.site, wan.mac)].append(wan)
+    return gateways
+
+
+def _report_prefix(wan_interface: str) -> str:
+    """Return the report attribute prefix of a WAN ("wan", "wan2", ...)."""
+    return "wan" if wan_interface in ("wan", "wan1") else wan_interface
@@ -0,0 +1,155 @@
+"""Persistent storage for UniFi WAN Status."""
+from __future__ import annotations
+
+from hashlib import sha256
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.singleton import singleton
+from homeassistant.helpers.storage import Store
+
+from .api import UniFiClient
+from .const import (
+    DOMAIN,
+    SESSION_SAVE_DELAY,
+    SESSION_STORAGE_KEY,
+    SESSION_STORAGE_VERSION,
+    SNAPSHOT_SAVE_DELAY,
+    SNAPSHOT_STORAGE_KEY,
+    SNAPSHOT_STORAGE_VERSION,
+    STATISTICS_STORAGE_KEY,
+    STATISTICS_STORAGE_VERSION,
+)
+from .models import WANRecord
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class UniFiSessionStore:
+    """Controller login sessions shared by the config flow and all entries.
+
+    Sessions are keyed by a hash of the controller URL and username, so a
+    login made while validating the config flow is reused by the entry it
+    creates, and entries on the same controller account share one login.
+    The file is private to the Home Assistant user, like the config entries
+    that hold the passwords.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the store."""
+        self._store: Store[dict[str, dict[str, Any]]] = Store(
+            hass, SESSION_STORAGE_VERSION, SESSION_STORAGE_KEY, private=True
+        )
+        self._sessions: dict[str, dict[str, Any]] = {}
+
+    async def async_load(self) -> None:
+        """Load the saved sessions."""
+        self._sessions = await self._store.async_load() or {}
+
+    @callback
+    def async_restore(self, client: UniFiClient) -> bool:
+        """Hand a saved session to the client; return True if there was one."""
+        if (state := self._sessions.get(_session_key(client))) is None:
+            return False
+        client.restore_session(state)
+        return True
+
+    @callback
+    def async_save(self, client: UniFiClient) -> None:
+        """Remember the client's current session."""
+        if (state := client.session_state) is None:
+            return
+        self._sessions[_session_key(client)] = state
+        self._store.async_delay_save(lambda: self._sessions, SESSION_SAVE_DELAY)
+
+    @callback
+    def async_remove(self, controller: str, username: str) -> None:
+        """Forget the session of a controller account."""
+        if self._sessions.pop(_account_key(controller, username), None) is not None:
+            self._store.async_delay_save(lambda: self._sessions, SESSION_SAVE_DELAY)
+
+
+class UniFiSnapshotStore:
+    """Last known WAN data of a config entry.
+
+    Restored at startup so entities come up immediately while the first
+    live poll runs in the background.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the store."""
+        self._store: Store[dict[str, dict[str, Any]]] = Store(
+            hass, SNAPSHOT_STORAGE_VERSION, f"{SNAPSHOT_STORAGE_KEY}.{entry_id}"
+        )
+        self._data: dict[str, WANRecord] = {}
+
+    async def async_load(self) -> dict[str, WANRecord] | None:
+        """Return the saved WAN data, or None if there is no usable snapshot."""
+        if not (saved := await self._store.async_load()):
+            return None
+        try:
+            return {
+                wan_id: WANRecord.from_dict(record) for wan_id, record in saved.items()
+            }
+        except (KeyError, TypeError, ValueError) as err:
+            _LOGGER.debug("Ignoring unreadable WAN snapshot: %s", err)
+            return None
+
+    @callback
+    def async_save(self, data: dict[str, WANRecord]) -> None:
+        """Save the WAN data, batching frequent updates into one write."""
+        self._data = data
+        self._store.async_delay_save(self._serialize, SNAPSHOT_SAVE_DELAY)
+
+    async def async_remove(self) -> None:
+        """Delete the snapshot."""
+        await self._store.async_remove()
+
+    def _serialize(self) -> dict[str, dict[str, Any]]:
+        """Return the latest WAN data as saved to disk."""
+        return {wan_id: record.as_dict() for wan_id, record in self._data.items()}
+
+
+class UniFiStatisticsStore:
+    """How far each gateway's reports of a config entry have been imported.
+
+    Maps "site/mac" to the first hour not yet imported, in epoch
+    milliseconds.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the store."""
+        self._store: Store[dict[str, int]] = Store(
+            hass, STATISTICS_STORAGE_VERSION, f"{STATISTICS_STORAGE_KEY}.{entry_id}"
+        )
+
+    async def async_load(self) -> dict[str, int]:
+        """Return the saved high-water marks."""
+        return await self._store.async_load() or {}
+
+    async def async_save(self, imported: dict[str, int]) -> None:
+        """Save the high-water marks."""
+        await self._store.async_save(imported)
+
+    async def async_remove(self) -> None:
+        """Delete the high-water marks."""
+        await self._store.async_remove()
+
+
+def _session_key(client: UniFiClient) -> str:
+    """Return the storage key for the client's controller account."""
+    return _account_key(client.controller, client.username)
+
+
+def _account_key(controller: str, username: str) -> str:
+    """Return the storage key for a controller URL and username."""
+    return sha256(f"{controller.rstrip('/')}|{username}".encode()).hexdigest()
+
+
+@singleton(f"{DOMAIN}_session_store")
+async def async_get_session_store(hass: HomeAssistant) -> UniFiSessionStore:
+    """Return the loaded session store."""
+    store = UniFiSessionStore(hass)
+    await store.async_load()
+    return store
@@ -0,0 +1,119 @@
+"""Incremental decoding of large controller answers."""
+from __future__ import annotations
+
+import codecs
+from collections.abc import Iterator
+import json
+import re
+from typing import Any
+
+# Bytes of the body decoded to text at a time
+CHUNK_SIZE = 1 << 16
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# What may follow a number that stopped short at the end of the window
+_NUMBER_TAIL = re.compile(r"[0-9+\-.eE]*\Z")
+
+
+class _Reader:
+    """Window of text over a UTF-8 body, decoded one chunk at a time.
+
+    Text before the current position is dropped whenever a chunk is
+    added, so the window only grows past CHUNK_SIZE while a single value
+    larger than that is being decoded. Such a value is retried with twice
+    as much text each time, which keeps the rescanning linear.
+    """
+
+    def __init__(self, body: bytes) -> None:
+        """Initialize the reader at the start of the body."""
+        self._body = memoryview(body)
+        self._offset = 0
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.index = 0
+
+    def more(self, size: int) -> bool:
+        """Decode the next size bytes into the window; False at the end."""
+        if self._offset >= len(self._body):
+            return False
+        chunk = self._body[self._offset : self._offset + size]
+        self._offset += len(chunk)
+        self.text = self.text[self.index :] + self._utf8.decode(
+            chunk, final=self._offset >= len(self._body)
+        )
+        self.index = 0
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, or "" at the end."""
+        while True:
+            self.index = _WHITESPACE.match(self.text, self.index).end()
+            if self.index < len(self.text):
+                return self.text[self.index]
+            if not self.more(CHUNK_SIZE):
+                return ""
+
+    def expect(self, char: str) -> None:
+        """Consume the given character or raise ValueError."""
+        if (found := self.peek()) != char:
+            raise ValueError(f"Expected {char!r}, found {found or 'end of data'!r}")
+        self.index += 1
+
+    def value(self) -> Any:
+        """Decode the JSON value at the current position."""
+        self.peek()
+        size = CHUNK_SIZE
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.text, self.index)
+            except json.JSONDecodeError:
+                # Incomplete until the rest of the value is in the window
+                if not self.more(size):
+                    raise
+                size *= 2
+                continue
+            # A number cut by the end of the window ("12." or "1e") decodes
+            # as its start; it may go on in the next chunk
+            if (
+                type(value) in (int, float)
+                and _NUMBER_TAIL.match(self.text, end)
+                and self.more(size)
+            ):
+                size *= 2
+                continue
+            self.index = end
+            return value
+
+
+def iter_data(body: bytes) -> Iterator[dict[str, Any]]:
+    """Yield the items of an API answer's "data" list one at a time.
+
+    Only the item being decoded and a window of the body's text are held
+    at once, where decoding the whole answer would build every item of
+    the list before the first one can be looked at. Other members of the
+    envelope (meta) are decoded and dropped. Raises ValueError on invalid
+    JSON, possibly after some items were yielded.
+    """
+    reader = _Reader(body)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if key == "data":
+            reader.expect("[")
+            if reader.peek() != "]":
+                while True:
+                    yield reader.value()
+                    if reader.peek() != ",":
+                        break
+                    reader.index += 1
+            reader.expect("]")
+        else:
+            reader.value()
+        if reader.peek() != ",":
+            break
+        reader.index += 1
+    reader.expect("}")
@@ -0,0 +1 @@
+"""Tests for the UniFi WAN Status integration."""
@@ -0,0 +1,64 @@
+"""Fixtures for UniFi WAN Status tests."""
+from __future__ import annotations
+
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from pathlib import Path
+import sys
+from typing import Any
+
+from aiohttp import web
+import pytest
+
+from homeassistant.core import HomeAssistant
+from custom_components.unifi_wan_status.api import UniFiClient, async_create_session
+from custom_components.unifi_wan_status.coordinator import UniFiWANCoordinator
+
+sys.path.insert(0, str(Path(__file__).parents[1] / "tools"))
+
+from fake_controller import (  # noqa: E402
+    FakeController,
+    FakeControllerConfig,
+    build_app,
+)
+
+StartController = Callable[..., Awaitable[tuple[FakeController, str]]]
+
+
+@pytest.fixture
+async def fake_controller(
+    socket_enabled: None,
+) -> AsyncGenerator[StartController, None]:
+    """Start fake controllers on free local ports.
+
+    The fixture is a function taking FakeControllerConfig fields and
+    returning the controller and its URL.
+    """
+    runners: list[web.AppRunner] = []
+
+    async def start(**config: Any) -> tuple[FakeController, str]:
+        controller = FakeController(FakeControllerConfig(**config))
+        runner = web.AppRunner(build_app(controller))
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        runners.append(runner)
+        host, port = runner.addresses[0][:2]
+        return controller, f"http://{host}:{port}"
+
+    yield start
+    for runner in runners:
+        await runner.cleanup()
+
+
+def make_coordinator(
+    hass: HomeAssistant,
+    url: str,
+    sites: dict[str, str] | None = None,
+    **kwargs: Any,
+) -> UniFiWANCoordinator:
+    """Return a coordinator polling a fake controller's default site."""
+    client = UniFiClient(
+        async_create_session(hass, False), url, "user", "pass", unifi_os=False
+    )
+    return UniFiWANCoordinator(
+        hass, client, sites or {"default": "Default"}, **kwargs
+    )
@@ -0,0 +1,47 @@
+"""Tests for the controller circuit breaker."""
+from __future__ import annotations
+
+from datetime import timedelta
+
+from freezegun.api import FrozenDateTimeFactory
+
+from custom_components.unifi_wan_status.breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+)
+
+
+def test_opens_after_threshold() -> None:
+    """The circuit stays closed until threshold failures in a row."""
+    breaker = CircuitBreaker(threshold=3, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+
+
+def test_half_open_probe(freezer: FrozenDateTimeFactory) -> None:
+    """After the reset timeout one probe decides the circuit's state."""
+    breaker = CircuitBreaker(threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    freezer.tick(timedelta(seconds=59))
+    assert breaker.state == STATE_OPEN
+    freezer.tick(timedelta(seconds=1))
+    assert breaker.state == STATE_HALF_OPEN
+
+    # A failed probe reopens the circuit for another reset timeout
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    freezer.tick(timedelta(seconds=60))
+    assert breaker.state == STATE_HALF_OPEN
+
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.failures == 0
@@ -0,0 +1,172 @@
+"""Tests for the WAN coordinator against the fake controller."""
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+import time
+
+from aiohttp import web
+from freezegun.api import FrozenDateTimeFactory
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from homeassistant.core import HomeAssistant
+
+from .conftest import StartController, make_coordinator
+
+
+async def test_push_does_not_postpone_poll(
+    hass: HomeAssistant,
+    fake_controller: StartController,
+    freezer: FrozenDateTimeFactory,
+) -> None:
+    """Pushed device updates leave the next scheduled poll where it was."""
+    controller, url = await fake_controller()
+    coordinator = make_coordinator(hass, url)
+    unsub = coordinator.async_add_listener(lambda: None)
+    await coordinator.async_refresh()
+    polls = controller.stats["health_requests"]
+
+    # Device syncs keep arriving more often than the poll interval
+    gateway = controller.gateway
+    step = coordinator.update_interval / 4
+    for count in range(1, 4):
+        freezer.tick(step)
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+        wan = {**gateway["wan1"], "rx_bytes": gateway["wan1"]["rx_bytes"] + count}
+        coordinator._async_apply_devices(
+            "default", [{"mac": gateway["mac"], "wan1": wan}]
+        )
+        assert coordinator.data[f"{gateway['mac']}_wan1"].rx_bytes == wan["rx_bytes"]
+    assert controller.stats["health_requests"] == polls
+
+    freezer.tick(step + timedelta(seconds=1))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert controller.stats["health_requests"] > polls
+
+    unsub()
+    await coordinator.async_shutdown()
+
+
+async def test_polls_through_expiring_sessions_and_errors(
+    hass: HomeAssistant,
+    fake_controller: StartController,
+    freezer: FrozenDateTimeFactory,
+) -> None:
+    """Expired logins and occasional 503s are absorbed by re-login and retries."""
+    controller, url = await fake_controller(session_ttl=30, error_rate=0.2, seed=1)
+    coordinator = make_coordinator(hass, url)
+    gateway = controller.gateway
+
+    succeeded = 0
+    for _ in range(20):
+        freezer.tick(timedelta(seconds=31))
+        await coordinator.async_refresh()
+        succeeded += coordinator.last_update_success
+    assert controller.stats["logins"] > 1
+    assert controller.stats["5xx"] > 0
+    assert succeeded >= 18
+    assert coordinator.data[f"{gateway['mac']}_wan1"].is_up
+
+    await coordinator.async_shutdown()
+
+
+async def test_refresh_devices_is_not_coalesced(
+    hass: HomeAssistant,
+    fake_controller: StartController,
+    freezer: FrozenDateTimeFactory,
+) -> None:
+    """A forced device refresh fetches device lists even right after a poll."""
+    controller, url = await fake_controller()
+    coordinator = make_coordinator(hass, url)
+    await coordinator.async_refresh()
+
+    devices = controller.stats["device_requests"]
+    await coordinator.async_refresh_devices()
+    assert controller.stats["device_requests"] == devices + 1
+
+    # A poll in flight only sends the heartbeat; the forced refresh follows it
+    freezer.tick(timedelta(seconds=10))
+    poll = hass.async_create_task(coordinator.async_refresh())
+    await asyncio.sleep(0)
+    await coordinator.async_refresh_devices()
+    await poll
+    assert controller.stats["device_requests"] == devices + 2
+
+    await coordinator.async_shutdown()
+
+
+async def test_history_skips_failed_sites(
+    hass: HomeAssistant,
+    fake_controller: StartController,
+    freezer: FrozenDateTimeFactory,
+) -> None:
+    """WANs carried over from a failed site are not recorded as observed."""
+    controller, url = await fake_controller(sites=2)
+    coordinator = make_coordinator(
+        hass, url, {"default": "Default", "site1": "Site 1"}
+    )
+    await coordinator.async_refresh()
+    default = f"{controller.sites['default'].gateways[0]['mac']}_wan1"
+    site1 = f"{controller.sites['site1'].gateways[0]['mac']}_wan1"
+
+    del controller.sites["site1"]
+    freezer.tick(timedelta(seconds=60))
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert site1 in coordinator.data
+
+    now = time.monotonic()
+    assert coordinator.history.get(default).availability("1h", now) == 100
+    assert coordinator.history.get(site1).availability("1h", now) is None
+
+    await coordinator.async_shutdown()
+
+
+async def test_due_device_fetch_runs_with_heartbeat(
+    hass: HomeAssistant,
+    fake_controller: StartController,
+    freezer: FrozenDateTimeFactory,
+) -> None:
+    """A device list that is due anyway is requested alongside the heartbeat."""
+    controller, url = await fake_controller()
+    in_flight = peak = 0
+    guard = controller._guard
+
+    async def counting_guard(request: web.Request) -> web.Response | None:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            # Give a concurrent request time to arrive; the frozen clock
+            # rules out the fake's latency setting
+            for _ in range(50):
+                await asyncio.sleep(0)
+            return await guard(request)
+        finally:
+            in_flight -= 1
+
+    controller._guard = counting_guard
+    coordinator = make_coordinator(hass, url)
+
+    # First poll: discovery is due
+    await coordinator.async_refresh()
+    assert controller.stats["device_requests"] == 1
+    assert peak == 2
+
+    # Heartbeat only
+    peak = 0
+    freezer.tick(timedelta(seconds=60))
+    await coordinator.async_refresh()
+    assert controller.stats["device_requests"] == 1
+    assert peak == 1
+
+    # device_interval passed
+    peak = 0
+    freezer.tick(timedelta(seconds=coordinator.device_interval))
+    await coordinator.async_refresh()
+    assert controller.stats["device_requests"] == 2
+    assert peak == 2
+
+    await coordinator.async_shutdown()
@@ -0,0 +1,154 @@
+"""Tests for the rolling WAN history."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.unifi_wan_status.const import (
+    HISTORY_MAX_GAP,
+    HISTORY_SLOT,
+    HISTORY_WINDOWS,
+)
+from custom_components.unifi_wan_status.history import HistoryTracker, WANHistory
+from custom_components.unifi_wan_status.models import WANRecord
+
+HOUR = HISTORY_WINDOWS["1h"]
+DAY = HISTORY_WINDOWS["24h"]
+WEEK = HISTORY_WINDOWS["7d"]
+
+
+def _record(wan_id: str, is_up: bool, latency: float | None = None) -> WANRecord:
+    """Return a WAN record with the given state."""
+    return WANRecord(
+        wan_id=wan_id,
+        wan_interface="wan1",
+        device_name="Gateway",
+        device_model="UXG",
+        mac="aa:bb:cc:dd:ee:ff",
+        site="default",
+        is_up=is_up,
+        latency=latency,
+    )
+
+
+def test_empty_history() -> None:
+    """A history with a single sample has nothing to report."""
+    history = WANHistory()
+    history.record(0, True, 20)
+    assert history.availability("1h", 0) is None
+    assert history.flaps("1h", 0) == 0
+    assert history.latency_percentile("1h", 50, 0) == pytest.approx(20, rel=0.05)
+
+
+def test_time_counts_in_previous_state() -> None:
+    """Time between samples counts in the state of the earlier one."""
+    history = WANHistory()
+    history.record(0, True, None)
+    history.record(60, True, None)
+    history.record(120, False, None)
+    history.record(240, True, None)
+    assert history.availability("1h", 240) == pytest.approx(50)
+    assert history.flaps("1h", 240) == 2
+
+
+def test_long_gaps_are_unobserved() -> None:
+    """At most HISTORY_MAX_GAP of a gap between samples is counted."""
+    history = WANHistory()
+    history.record(0, False, None)
+    history.record(HISTORY_MAX_GAP * 3, True, None)
+    history.record(HISTORY_MAX_GAP * 4, True, None)
+    assert history.availability("1h", HISTORY_MAX_GAP * 4) == pytest.approx(50)
+
+
+def test_slot_keeps_first_latency_sample() -> None:
+    """Each slot holds one latency sample; a new slot takes the next one."""
+    history = WANHistory()
+    history.record(0, True, 10)
+    history.record(HISTORY_SLOT / 2, True, 1000)
+    assert history.latency_percentile("1h", 100, HISTORY_SLOT / 2) == pytest.approx(
+        10, rel=0.05
+    )
+    history.record(HISTORY_SLOT, True, 1000)
+    assert history.latency_percentile("1h", 50, HISTORY_SLOT) == pytest.approx(
+        10, rel=0.05
+    )
+    assert history.latency_percentile("1h", 100, HISTORY_SLOT) == pytest.approx(
+        1000, rel=0.05
+    )
+
+
+def test_no_latency_while_down() -> None:
+    """Down WANs and gateways without a latency add no samples."""
+    history = WANHistory()
+    history.record(0, False, 50)
+    history.record(HISTORY_SLOT, True, None)
+    history.record(2 * HISTORY_SLOT, True, 0)
+    assert history.latency_percentile("1h", 50, 2 * HISTORY_SLOT) is None
+
+
+@pytest.mark.parametrize("latency", [1, 9.5, 42, 180, 2500])
+def test_histogram_within_five_percent(latency: float) -> None:
+    """Percentiles come from 5% wide bins."""
+    history = WANHistory()
+    history.record(0, True, latency)
+    assert history.latency_percentile("24h", 50, 0) == pytest.approx(
+        latency, rel=0.05, abs=0.05
+    )
+
+
+def test_percentiles_over_many_samples() -> None:
+    """Percentiles rank samples across slots."""
+    history = WANHistory()
+    for minute in range(100):
+        history.record(minute * HISTORY_SLOT, True, minute + 1)
+    now = 99 * HISTORY_SLOT
+    assert history.latency_percentile("1h", 50, now) == pytest.approx(70, rel=0.05)
+    assert history.latency_percentile("24h", 50, now) == pytest.approx(50, rel=0.05)
+    assert history.latency_percentile("24h", 95, now) == pytest.approx(95, rel=0.05)
+
+
+def test_windows_roll_independently() -> None:
+    """Old slots leave the 1h window before the 24h and 7d ones."""
+    history = WANHistory()
+    history.record(0, False, None)
+    history.record(HISTORY_SLOT, True, None)
+    now = HISTORY_SLOT
+    while now < HOUR + 2 * HISTORY_SLOT:
+        now += HISTORY_SLOT
+        history.record(now, True, None)
+    assert history.availability("1h", now) == 100
+    assert history.flaps("1h", now) == 0
+    assert history.availability("24h", now) < 100
+    assert history.flaps("24h", now) == 1
+    assert history.flaps("7d", now) == 1
+
+    now = 2 * DAY
+    history.record(now, True, None)
+    assert history.flaps("24h", now) == 0
+    assert history.flaps("7d", now) == 1
+    # Windows also shrink when read without a new sample
+    assert history.flaps("7d", WEEK + 2 * HISTORY_SLOT) == 0
+
+
+def test_ring_wraps_around() -> None:
+    """Recording past the ring's capacity keeps the 7d totals exact."""
+    history = WANHistory()
+    now = 0
+    for slot in range(WEEK // HISTORY_SLOT + 500):
+        now = slot * HISTORY_SLOT
+        # Down for the first minute of every hour
+        history.record(now, slot % 60 != 0, 20)
+    assert history.availability("7d", now) == pytest.approx(100 * 59 / 60, abs=0.1)
+    assert history.flaps("7d", now) == pytest.approx(2 * WEEK / HOUR, abs=2)
+    assert history.latency_percentile("7d", 50, now) == pytest.approx(20, rel=0.05)
+
+
+def test_tracker_records_and_prunes() -> None:
+    """The tracker keeps one history per reported WAN."""
+    tracker = HistoryTracker()
+    tracker.record([_record("a_wan1", True), _record("b_wan1", False)], 0)
+    tracker.record([_record("a_wan1", True), _record("b_wan1", False)], 60)
+    assert tracker.get("a_wan1").availability("1h", 60) == 100
+    assert tracker.get("b_wan1").availability("1h", 60) == 0
+    tracker.prune(["a_wan1"])
+    assert tracker.get("b_wan1") is None
+    assert tracker.get("a_wan1") is not None
@@ -0,0 +1,72 @@
+"""Tests for the per-WAN rate tracker."""
+from __future__ import annotations
+
+from custom_components.unifi_wan_status.const import MAX_RATE_GAP
+from custom_components.unifi_wan_status.rates import RateTracker
+
+WAN_ID = "aa:bb:cc:dd:ee:ff_wan1"
+
+
+def _wan(rx_bytes: int, tx_bytes: int = 0) -> dict[str, int]:
+    """Return a raw WAN object with the given byte counters."""
+    return {"rx_bytes": rx_bytes, "tx_bytes": tx_bytes, "rx_packets": 0, "tx_packets": 0}
+
+
+def test_first_sample_has_no_rate() -> None:
+    """A WAN's first sample only sets the baseline."""
+    rates = RateTracker().update(WAN_ID, _wan(1000), 0)
+    assert rates["rx_rate"] is None
+    assert rates["tx_rate"] is None
+
+
+def test_rate_over_elapsed_time() -> None:
+    """Rates are averaged over the time between samples."""
+    tracker = RateTracker()
+    tracker.update(WAN_ID, _wan(0, 0), 0)
+    rates = tracker.update(WAN_ID, _wan(60_000_000, 6_000_000), 60)
+    assert rates["rx_rate"] == 1_000_000
+    assert rates["tx_rate"] == 100_000
+
+
+def test_idle_wan_drops_to_zero() -> None:
+    """Counters that stop moving while time passes give a rate of 0."""
+    tracker = RateTracker()
+    tracker.update(WAN_ID, _wan(0), 0)
+    assert tracker.update(WAN_ID, _wan(10_000_000), 10)["rx_rate"] == 1_000_000
+    for sampled_at in (70, 600, 1200):
+        assert tracker.update(WAN_ID, _wan(10_000_000), sampled_at)["rx_rate"] == 0
+
+
+def test_unrefreshed_sample_keeps_rates() -> None:
+    """A sample taken at the same time as the last one changes nothing."""
+    tracker = RateTracker()
+    tracker.update(WAN_ID, _wan(0), 0)
+    tracker.update(WAN_ID, _wan(10_000_000), 10)
+    assert tracker.update(WAN_ID, _wan(10_000_000), 10)["rx_rate"] == 1_000_000
+    # The baseline was kept, so the next rate covers the whole interval
+    assert tracker.update(WAN_ID, _wan(30_000_000), 20)["rx_rate"] == 2_000_000
+
+
+def test_reset_yields_no_rate() -> None:
+    """A counter that went back far from the 32-bit limit is a reset."""
+    tracker = RateTracker()
+    tracker.update(WAN_ID, _wan(5_000_000_000), 0)
+    assert tracker.update(WAN_ID, _wan(1000), 10)["rx_rate"] is None
+    assert tracker.update(WAN_ID, _wan(11_000), 20)["rx_rate"] == 1000
+
+
+def test_32_bit_wrap() -> None:
+    """A counter that went back just below 2**32 wrapped around."""
+    tracker = RateTracker()
+    tracker.update(WAN_ID, _wan(2**32 - 5000), 0)
+    assert tracker.update(WAN_ID, _wan(5000), 10)["rx_rate"] == 1000
+
+
+def test_gap_starts_over() -> None:
+    """Samples further apart than MAX_RATE_GAP give no rate."""
+    tracker = RateTracker()
+    tracker.update(WAN_ID, _wan(0), 0)
+    tracker.update(WAN_ID, _wan(10_000_000), 10)
+    gap_end = 10 + MAX_RATE_GAP + 1
+    assert tracker.update(WAN_ID, _wan(10_000_000), gap_end)["rx_rate"] is None
+    assert tracker.update(WAN_ID, _wan(20_000_000), gap_end + 10)["rx_rate"] == 1_000_000
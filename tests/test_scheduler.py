@@ -0,0 +1,102 @@
+"""Tests for the adaptive poll scheduler."""
+from __future__ import annotations
+
+from datetime import timedelta
+
+from freezegun.api import FrozenDateTimeFactory
+
+from custom_components.unifi_wan_status.const import (
+    BACKOFF_JITTER,
+    BACKOFF_MAX_INTERVAL,
+    FLAP_THRESHOLD,
+    FLAP_WINDOW,
+    RECONCILE_INTERVAL,
+    SETTLE_TIME,
+    STABLE_AFTER,
+)
+from custom_components.unifi_wan_status.scheduler import (
+    REASON_BACKOFF,
+    REASON_FAILOVER,
+    REASON_FLAPPING,
+    REASON_NORMAL,
+    REASON_PUSH,
+    REASON_STABLE,
+    REASON_WAN_DOWN,
+    PollScheduler,
+)
+
+
+def test_wan_never_up_does_not_poll_fast(freezer: FrozenDateTimeFactory) -> None:
+    """An unplugged WAN does not hold the fast interval."""
+    scheduler = PollScheduler(fast_interval=10, normal_interval=60)
+    assert scheduler.record_success({"wan1": True, "wan2": False}) == 60
+    assert scheduler.reason == REASON_NORMAL
+    freezer.tick(timedelta(seconds=STABLE_AFTER))
+    scheduler.record_success({"wan1": True, "wan2": False})
+    assert scheduler.reason == REASON_STABLE
+
+
+def test_wan_down_polls_fast_then_decays(freezer: FrozenDateTimeFactory) -> None:
+    """A WAN that goes down polls fast for SETTLE_TIME, then relaxes."""
+    scheduler = PollScheduler(fast_interval=10, normal_interval=60)
+    scheduler.record_success({"wan1": True, "wan2": True})
+    freezer.tick(timedelta(seconds=60))
+    assert scheduler.record_success({"wan1": True, "wan2": False}) == 10
+    assert scheduler.reason == REASON_WAN_DOWN
+    freezer.tick(timedelta(seconds=SETTLE_TIME - 1))
+    assert scheduler.record_success({"wan1": True, "wan2": False}) == 10
+    freezer.tick(timedelta(seconds=2))
+    assert scheduler.record_success({"wan1": True, "wan2": False}) == 60
+    assert scheduler.reason == REASON_NORMAL
+    freezer.tick(timedelta(seconds=STABLE_AFTER))
+    scheduler.record_success({"wan1": True, "wan2": False})
+    assert scheduler.reason == REASON_STABLE
+
+
+def test_failover_polls_fast_until_settled(freezer: FrozenDateTimeFactory) -> None:
+    """A WAN coming back up polls fast for SETTLE_TIME."""
+    scheduler = PollScheduler(fast_interval=10, normal_interval=60)
+    scheduler.record_success({"wan1": False})
+    freezer.tick(timedelta(seconds=60))
+    assert scheduler.record_success({"wan1": True}) == 10
+    assert scheduler.reason == REASON_FAILOVER
+    freezer.tick(timedelta(seconds=SETTLE_TIME))
+    assert scheduler.record_success({"wan1": True}) == 60
+    assert scheduler.reason == REASON_NORMAL
+
+
+def test_flapping_until_transitions_age_out(freezer: FrozenDateTimeFactory) -> None:
+    """FLAP_THRESHOLD transitions within FLAP_WINDOW count as flapping."""
+    scheduler = PollScheduler(fast_interval=10, normal_interval=60)
+    is_up = True
+    scheduler.record_success({"wan1": is_up, "wan2": True})
+    # An even number of transitions, so wan1 ends up
+    for _ in range(FLAP_THRESHOLD + FLAP_THRESHOLD % 2):
+        freezer.tick(timedelta(seconds=10))
+        is_up = not is_up
+        scheduler.record_success({"wan1": is_up, "wan2": True})
+    assert scheduler.reason == REASON_FLAPPING
+    freezer.tick(timedelta(seconds=FLAP_WINDOW + 1))
+    scheduler.record_success({"wan1": is_up, "wan2": True})
+    assert scheduler.reason != REASON_FLAPPING
+
+
+def test_push_reconciles_slowly() -> None:
+    """While pushes arrive, polling only reconciles."""
+    scheduler = PollScheduler()
+    scheduler.push = True
+    assert scheduler.record_success({"wan1": False}) == RECONCILE_INTERVAL
+    assert scheduler.reason == REASON_PUSH
+
+
+def test_backoff_grows_and_resets() -> None:
+    """Failures back off exponentially, capped, until a poll succeeds."""
+    scheduler = PollScheduler(fast_interval=10, normal_interval=60)
+    delays = [scheduler.record_failure() for _ in range(10)]
+    assert scheduler.reason == REASON_BACKOFF
+    assert scheduler.failures == 10
+    assert 60 * (1 - BACKOFF_JITTER) <= delays[0] <= 60 * (1 + BACKOFF_JITTER)
+    assert 120 * (1 - BACKOFF_JITTER) <= delays[1] <= 120 * (1 + BACKOFF_JITTER)
+    assert max(delays) <= BACKOFF_MAX_INTERVAL * (1 + BACKOFF_JITTER)
+    assert scheduler.record_success({"wan1": True}) == 60
+    assert scheduler.failures == 0
@@ -0,0 +1,65 @@
+"""Tests for the UniFi WAN Status sensor platform."""
+from __future__ import annotations
+
+from datetime import timedelta
+
+from freezegun.api import FrozenDateTimeFactory
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.unifi_wan_status.const import DOMAIN, ORPHAN_GRACE
+
+from .conftest import StartController
+
+
+async def test_missing_wan_removed_after_grace(
+    hass: HomeAssistant,
+    enable_custom_integrations: None,
+    fake_controller: StartController,
+    freezer: FrozenDateTimeFactory,
+) -> None:
+    """A gateway missing from the device list keeps its sensors for a while."""
+    controller, url = await fake_controller(gateways=2)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="UniFi",
+        data={
+            "controller": url,
+            "username": "user",
+            "password": "pass",
+            "sites": {"default": "Default"},
+            "verify_ssl": False,
+        },
+        version=2,
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    entity_registry = er.async_get(hass)
+
+    site = controller.sites["default"]
+    gateway = site.gateways.pop()
+    site.devices.remove(gateway)
+    unique_id = f"{DOMAIN}_{gateway['mac']}_wan1"
+    entity_id = entity_registry.async_get_entity_id("sensor", DOMAIN, unique_id)
+    assert hass.states.get(entity_id)
+
+    async def poll(seconds: float) -> None:
+        freezer.tick(timedelta(seconds=seconds))
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+
+    await poll(coordinator.device_interval + 1)
+    assert f"{gateway['mac']}_wan1" not in coordinator.data
+    await poll(ORPHAN_GRACE / 2)
+    assert entity_registry.async_get(entity_id)
+
+    await poll(ORPHAN_GRACE / 2)
+    assert entity_registry.async_get(entity_id) is None
+    assert hass.states.get(entity_id) is None
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
@@ -0,0 +1,85 @@
+"""Tests for the incremental device list decoder."""
+from __future__ import annotations
+
+import json
+import random
+from typing import Any
+
+import pytest
+
+from custom_components.unifi_wan_status import api, stream
+from custom_components.unifi_wan_status.api import UniFiConnectionError, _iter_items
+from custom_components.unifi_wan_status.stream import iter_data
+
+
+def _random_value(rng: random.Random, depth: int = 0) -> Any:
+    """Return a random JSON value, numbers of every shape included."""
+    kind = rng.randrange(8 if depth < 3 else 5)
+    if kind == 0:
+        return rng.randrange(-(10**12), 10**12)
+    if kind == 1:
+        return rng.uniform(-1e6, 1e6) * 10 ** rng.randrange(-30, 30)
+    if kind == 2:
+        return rng.choice([True, False, None])
+    if kind == 3:
+        return "".join(rng.choice('ab\\"é€\n ') for _ in range(rng.randrange(12)))
+    if kind == 4:
+        return rng.randrange(10)
+    if kind == 5:
+        return [_random_value(rng, depth + 1) for _ in range(rng.randrange(5))]
+    return {
+        f"key{index}": _random_value(rng, depth + 1)
+        for index in range(rng.randrange(5))
+    }
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 16, 64])
+def test_matches_json_loads(monkeypatch: pytest.MonkeyPatch, chunk_size: int) -> None:
+    """Items come out as json.loads decodes them, whatever the chunking."""
+    monkeypatch.setattr(stream, "CHUNK_SIZE", chunk_size)
+    rng = random.Random(chunk_size)
+    for _ in range(200):
+        envelope = {
+            "meta": {"rc": "ok", "count": rng.randrange(10**6)},
+            "data": [_random_value(rng) for _ in range(rng.randrange(8))],
+            "total": rng.uniform(0, 1e9),
+        }
+        body = json.dumps(
+            envelope, indent=rng.choice([None, 1]), ensure_ascii=rng.random() < 0.5
+        ).encode()
+        assert list(iter_data(body)) == json.loads(body)["data"]
+
+
+@pytest.mark.parametrize("number", ["12.5", "1e10", "-3.25E-7", "123456789", "0"])
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 4, 5])
+def test_number_split_across_chunks(
+    monkeypatch: pytest.MonkeyPatch, chunk_size: int, number: str
+) -> None:
+    """A number cut at a chunk boundary is read whole."""
+    monkeypatch.setattr(stream, "CHUNK_SIZE", chunk_size)
+    body = f'{{"count": {number}, "data": [{number}, {number}]}}'.encode()
+    assert list(iter_data(body)) == json.loads(body)["data"]
+
+
+@pytest.mark.parametrize(
+    "body", [b"", b"[]", b'{"data": [1, 2', b'{"data": [1 2]}', b'{"data": {}}']
+)
+def test_invalid_json(monkeypatch: pytest.MonkeyPatch, body: bytes) -> None:
+    """Malformed answers raise ValueError."""
+    monkeypatch.setattr(stream, "CHUNK_SIZE", 4)
+    with pytest.raises(ValueError):
+        list(iter_data(body))
+
+
+@pytest.mark.parametrize("stream_min", [0, 1 << 30])
+def test_client_decodes_small_and_large_alike(
+    monkeypatch: pytest.MonkeyPatch, stream_min: int
+) -> None:
+    """Whole and incremental decoding yield the same items and errors."""
+    monkeypatch.setattr(api, "STREAM_DECODE_MIN", stream_min)
+    body = json.dumps({"meta": {"rc": "ok"}, "data": [{"mac": "a"}, 1.5]}).encode()
+    assert list(_iter_items(body, "stat/device")) == [{"mac": "a"}, 1.5]
+    assert list(_iter_items(b'{"meta": {}}', "stat/device")) == []
+    for invalid in (b"[]", b'{"data": {}}', b'{"data": [1 2]}'):
+        with pytest.raises(UniFiConnectionError):
+            list(_iter_items(invalid, "stat/device"))
@@ -0,0 +1,290 @@
+"""Offline benchmarks for the coordinator parse and entity pipeline.
+
+Runs the JSON decoding (whole answer and the streaming gateway scan),
+the unchanged-answer fingerprint, the health heartbeat summary, the WAN
+extraction and the entity properties against synthetic
+payloads (see payloads.py), from a single gateway up to sites with
+thousands of devices and multi-WAN gateways:
+
+    python tools/benchmark.py
+    python tools/benchmark.py --scenario large-site --repeat 20
+
+Each run is appended to .benchmarks/results.jsonl and compared with the
+previous run of the same scenario, so regressions show up as a delta.
+Requires Home Assistant to be installed, like the integration itself.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import UTC, datetime
+import gc
+import json
+from pathlib import Path
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.util.json import json_loads  # noqa: E402
+
+from custom_components.unifi_wan_status.api import (  # noqa: E402
+    UniFiClient,
+    _fingerprint,
+    _iter_items,
+    async_create_session,
+)
+from custom_components.unifi_wan_status.coordinator import (  # noqa: E402
+    UniFiWANCoordinator,
+    _has_wan,
+)
+from custom_components.unifi_wan_status.models import HealthSummary  # noqa: E402
+from custom_components.unifi_wan_status.stream import iter_data  # noqa: E402
+from custom_components.unifi_wan_status.sensor import (  # noqa: E402
+    WAN_HISTORY_SENSORS,
+    WAN_METRIC_SENSORS,
+    UniFiWANMetricSensor,
+    UniFiWANSensor,
+)
+from payloads import envelope, make_devices, make_health  # noqa: E402
+
+SCENARIOS: dict[str, dict[str, int]] = {
+    "single-gateway": {"devices": 1, "gateways": 1, "wans": 1},
+    "small-site": {"devices": 50, "gateways": 1, "wans": 2},
+    "large-site": {"devices": 1000, "gateways": 1, "wans": 2},
+    "huge-multi-wan": {"devices": 5000, "gateways": 4, "wans": 4},
+}
+
+DEFAULT_OUTPUT = Path(".benchmarks/results.jsonl")
+
+
+def _scan_gateways(raw: bytes) -> list[dict[str, Any]]:
+    """Decode an answer one device at a time, keeping only gateways."""
+    return [device for device in iter_data(raw) if _has_wan(device)]
+
+
+def _poll_gateways(raw: bytes) -> list[dict[str, Any]]:
+    """Keep the gateways of an answer the way the client decodes it.
+
+    Answers below STREAM_DECODE_MIN are decoded whole, larger ones scanned.
+    """
+    return [device for device in _iter_items(raw, "stat/device") if _has_wan(device)]
+
+
+def _peak(func: Any, *args: Any) -> int:
+    """Return the peak memory allocated while running func, in bytes."""
+    gc.collect()
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def _best_of(repeat: int, func: Any, *args: Any) -> float:
+    """Return the fastest of repeat calls, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def _read_entities(
+    status: list[UniFiWANSensor], metrics: list[UniFiWANMetricSensor]
+) -> None:
+    """Read every property Home Assistant reads on a state write."""
+    for entity in status:
+        _ = (entity.name, entity.native_value, entity.icon, entity.extra_state_attributes)
+    for entity in metrics:
+        _ = entity.native_value
+
+
+def run_scenario(
+    coordinator: UniFiWANCoordinator, params: dict[str, int], repeat: int
+) -> dict[str, Any]:
+    """Benchmark one payload size and return its measurements."""
+    devices = make_devices(params["devices"], params["gateways"], params["wans"])
+    health = make_health(
+        gateways=[device for device in devices if device.get("type") == "uxg"]
+    )
+    raw = json.dumps(envelope(devices)).encode()
+    heartbeat_raw = json.dumps(envelope(health)).encode()
+
+    # The stdlib decoder is kept as a reference for the one the client uses
+    stdlib_decode_ms = _best_of(repeat, json.loads, raw)
+    decode_ms = _best_of(repeat, json_loads, raw)
+    scan_ms = _best_of(repeat, _scan_gateways, raw)
+    fingerprint_ms = _best_of(repeat, _fingerprint, raw)
+    # What a poll costs when the heartbeat shows no change
+    heartbeat_ms = _best_of(
+        repeat, lambda: HealthSummary.from_health(json_loads(heartbeat_raw)["data"])
+    )
+    extract_ms = _best_of(
+        repeat, coordinator._extract_wan_data, "default", devices, health
+    )
+
+    # Peak memory of one poll: scanning the answer and extracting the WANs,
+    # and for reference what decoding the whole answer would take. The client
+    # reads the raw answer in full before decoding it, so that counts too.
+    peak = len(raw) + _peak(
+        lambda: coordinator._extract_wan_data("default", _poll_gateways(raw), health)
+    )
+    full_peak = len(raw) + _peak(
+        lambda: coordinator._extract_wan_data(
+            "default", json_loads(raw)["data"], health
+        )
+    )
+
+    coordinator.data = coordinator._extract_wan_data("default", devices, health)
+    status = [UniFiWANSensor(coordinator, wan_id) for wan_id in coordinator.data]
+    metrics = [
+        UniFiWANMetricSensor(coordinator, wan_id, description)
+        for wan_id in coordinator.data
+        for description in WAN_METRIC_SENSORS
+    ]
+    entities_ms = _best_of(repeat, _read_entities, status, metrics)
+
+    # Extraction limited to what the entities enabled by default show
+    coordinator.async_use_fields(_default_fields())
+    extract_default_ms = _best_of(
+        repeat, coordinator._extract_wan_data, "default", devices, health
+    )
+
+    return {
+        **params,
+        "wan_count": len(coordinator.data),
+        "payload_bytes": len(raw),
+        "heartbeat_bytes": len(heartbeat_raw),
+        "stdlib_decode_ms": round(stdlib_decode_ms, 3),
+        "decode_ms": round(decode_ms, 3),
+        "scan_ms": round(scan_ms, 3),
+        "fingerprint_ms": round(fingerprint_ms, 3),
+        "heartbeat_ms": round(heartbeat_ms, 3),
+        "extract_ms": round(extract_ms, 3),
+        "extract_default_ms": round(extract_default_ms, 3),
+        "peak_kib": round(peak / 1024, 1),
+        "full_peak_kib": round(full_peak / 1024, 1),
+        "entities_ms": round(entities_ms, 4),
+    }
+
+
+def _default_fields() -> set[str]:
+    """Return the WANRecord fields shown by the entities enabled by default."""
+    return {
+        *UniFiWANSensor._watched_keys,
+        *(
+            description.key
+            for description in WAN_METRIC_SENSORS
+            if description.entity_registry_enabled_default
+        ),
+        *(
+            field
+            for description in WAN_HISTORY_SENSORS
+            if description.entity_registry_enabled_default
+            for field in description.fields
+        ),
+    }
+
+
+def _git_revision() -> str | None:
+    """Return the short commit hash of the working tree, if available."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _previous_results(output: Path) -> dict[str, dict[str, Any]]:
+    """Return the last recorded result per scenario."""
+    previous: dict[str, dict[str, Any]] = {}
+    if not output.exists():
+        return previous
+    for line in output.read_text().splitlines():
+        if line.strip():
+            previous.update(json.loads(line)["scenarios"])
+    return previous
+
+
+def _format_delta(current: float, previous: float | None) -> str:
+    """Return the relative change against the previous run."""
+    if not previous:
+        return ""
+    return f" ({(current - previous) / previous:+.0%})"
+
+
+async def main() -> None:
+    """Run the selected scenarios, print and record the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="scenario to run (repeatable, default: all)",
+    )
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument(
+        "--no-record", action="store_true", help="do not append to the output file"
+    )
+    args = parser.parse_args()
+
+    hass = HomeAssistant(str(Path.cwd()))
+    previous = _previous_results(args.output)
+    results: dict[str, dict[str, Any]] = {}
+
+    for name in args.scenario or SCENARIOS:
+        client = UniFiClient(
+            async_create_session(hass, False), "https://controller.invalid", "user", "pass"
+        )
+        coordinator = UniFiWANCoordinator(hass, client, {"default": "Default"})
+        result = results[name] = run_scenario(coordinator, SCENARIOS[name], args.repeat)
+        before = previous.get(name, {})
+        print(
+            f"{name:<16} {result['devices']:>5} devices {result['wan_count']:>3} WANs"
+            f" {result['payload_bytes'] / 1024:>9.1f} KiB |"
+            f" decode {result['decode_ms']:8.3f} ms"
+            f"{_format_delta(result['decode_ms'], before.get('decode_ms'))}"
+            f" (stdlib {result['stdlib_decode_ms']:.3f} ms) |"
+            f" scan {result['scan_ms']:8.3f} ms"
+            f"{_format_delta(result['scan_ms'], before.get('scan_ms'))} |"
+            f" fingerprint {result['fingerprint_ms']:7.3f} ms |"
+            f" heartbeat {result['heartbeat_bytes'] / 1024:.1f} KiB"
+            f" {result['heartbeat_ms']:6.3f} ms |"
+            f" extract {result['extract_ms']:7.3f} ms"
+            f"{_format_delta(result['extract_ms'], before.get('extract_ms'))}"
+            f" (default entities {result['extract_default_ms']:.3f} ms) |"
+            f" peak {result['peak_kib']:9.1f} KiB"
+            f"{_format_delta(result['peak_kib'], before.get('peak_kib'))}"
+            f" (whole answer {result['full_peak_kib']:.1f} KiB) |"
+            f" entities {result['entities_ms']:7.4f} ms"
+            f"{_format_delta(result['entities_ms'], before.get('entities_ms'))}"
+        )
+
+    await hass.async_stop(force=True)
+
+    if not args.no_record:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with args.output.open("a") as file:
+            record = {
+                "time": datetime.now(UTC).isoformat(timespec="seconds"),
+                "revision": _git_revision(),
+                "python": platform.python_version(),
+                "scenarios": results,
+            }
+            file.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,446 @@
+"""Scriptable local stand-in for a UniFi Controller.
+
+Serves the endpoints the integration uses (login, the site list,
+stat/device with the optional macs filter, stat/health, the hourly
+gateway report and the site event websocket) with configurable payload
+size and faults, so polling, re-login and push mode can be exercised
+without real hardware:
+
+    python tools/fake_controller.py --port 8443 --flap-interval 20
+    python tools/fake_controller.py --devices 2000 --latency 0.3 \\
+        --session-ttl 60 --error-rate 0.05 --script flaps.json
+    python tools/fake_controller.py --sites 40 --unifi-os
+
+Then add the integration with controller URL http://127.0.0.1:8443 and any
+username/password. The --script file is a JSON list of steps such as
+{"after": 10, "site": "default", "gateway": 0, "wan": "wan2", "up": false};
+each step waits "after" seconds, sets the WAN state and pushes a
+device:sync message. Sites are named default, site1, site2 and so on.
+
+With --unifi-os the controller behaves like a UniFi OS console: login is
+/api/auth/login, the Network API lives under /proxy/network, and requests
+other than login must echo the X-CSRF-Token header handed out at login.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+from dataclasses import dataclass, field
+import json
+import logging
+from pathlib import Path
+import random
+import secrets
+import sys
+import time
+from typing import Any
+
+from aiohttp import WSMsgType, web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from payloads import envelope, make_devices, make_health  # noqa: E402
+
+_LOGGER = logging.getLogger("fake_controller")
+
+SESSION_COOKIE = "unifises"
+UNIFI_OS_COOKIE = "TOKEN"
+UNIFI_OS_PREFIX = "/proxy/network"
+
+
+@dataclass
+class FakeControllerConfig:
+    """Behaviour of the fake controller."""
+
+    sites: int = 1
+    devices: int = 1
+    gateways: int = 1
+    wans: int = 2
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    session_ttl: float | None = None
+    error_rate: float = 0.0
+    # Gateways report new stats at this interval; polls in between get the
+    # same answer, like a real controller between device informs
+    stats_interval: float = 0.0
+    unifi_os: bool = False
+    seed: int = 0
+    script: list[dict[str, Any]] = field(default_factory=list)
+
+
+@dataclass
+class FakeSite:
+    """Devices, ISP and event subscribers of one site."""
+
+    name: str
+    desc: str
+    devices: list[dict[str, Any]]
+    isp_name: str
+    gateways: list[dict[str, Any]] = field(init=False)
+    websockets: set[web.WebSocketResponse] = field(default_factory=set)
+    stats_at: float = float("-inf")
+
+    def __post_init__(self) -> None:
+        """Index the gateways."""
+        self.gateways = [
+            device
+            for device in self.devices
+            if any(key.startswith("wan") for key in device)
+        ]
+
+
+class FakeController:
+    """In-memory controller state shared by the HTTP and websocket handlers."""
+
+    def __init__(self, config: FakeControllerConfig | None = None) -> None:
+        """Initialize the fake controller."""
+        self.config = config or FakeControllerConfig()
+        self.rng = random.Random(self.config.seed)
+        # session token -> expiry (monotonic) or None
+        self.sessions: dict[str, float | None] = {}
+        self.csrf_token = secrets.token_hex(16)
+        self.sites: dict[str, FakeSite] = {}
+        for index in range(self.config.sites):
+            name = f"site{index}" if index else "default"
+            self.sites[name] = FakeSite(
+                name,
+                f"Site {index}" if index else "Default",
+                make_devices(
+                    self.config.devices,
+                    self.config.gateways,
+                    self.config.wans,
+                    self.config.seed + index,
+                ),
+                f"ISP {index}" if index else "Example ISP",
+            )
+        self.stats: Counter[str] = Counter()
+
+    @property
+    def devices(self) -> list[dict[str, Any]]:
+        """Return the devices of the default site."""
+        return self.sites["default"].devices
+
+    @property
+    def gateways(self) -> list[dict[str, Any]]:
+        """Return the gateways of the default site."""
+        return self.sites["default"].gateways
+
+    @property
+    def gateway(self) -> dict[str, Any]:
+        """Return the first gateway of the default site."""
+        return self.gateways[0]
+
+    @property
+    def cookie_name(self) -> str:
+        """Return the session cookie name for the controller flavor."""
+        return UNIFI_OS_COOKIE if self.config.unifi_os else SESSION_COOKIE
+
+    def authorized(self, request: web.Request) -> bool:
+        """Return True if the request carries a valid, unexpired session."""
+        token = request.cookies.get(self.cookie_name)
+        if token not in self.sessions:
+            return False
+        expires = self.sessions[token]
+        if expires is not None and time.monotonic() > expires:
+            del self.sessions[token]
+            return False
+        if self.config.unifi_os and request.headers.get("X-CSRF-Token") != self.csrf_token:
+            return False
+        return True
+
+    async def _delay(self) -> None:
+        """Simulate the controller's response time."""
+        if self.config.latency or self.config.latency_jitter:
+            await asyncio.sleep(
+                self.config.latency + self.rng.uniform(0, self.config.latency_jitter)
+            )
+
+    async def _guard(self, request: web.Request) -> web.Response | None:
+        """Apply latency and faults; return an error response if one applies."""
+        self.stats["requests"] += 1
+        await self._delay()
+        if not self.authorized(request):
+            self.stats["401"] += 1
+            return web.json_response(
+                {"meta": {"rc": "error", "msg": "api.err.LoginRequired"}}, status=401
+            )
+        if self.config.error_rate and self.rng.random() < self.config.error_rate:
+            self.stats["5xx"] += 1
+            return web.json_response({"meta": {"rc": "error"}}, status=503)
+        return None
+
+    async def index(self, request: web.Request) -> web.Response:
+        """Answer like the controller's landing page.
+
+        UniFi OS serves its web app with a 200; classic controllers
+        redirect to /manage.
+        """
+        if self.config.unifi_os:
+            return web.Response(
+                text="<html></html>",
+                content_type="text/html",
+                headers={"X-CSRF-Token": self.csrf_token},
+            )
+        raise web.HTTPFound("/manage")
+
+    async def login(self, request: web.Request) -> web.Response:
+        """Accept any credentials and hand out a session cookie."""
+        self.stats["requests"] += 1
+        self.stats["logins"] += 1
+        await self._delay()
+        body = await request.json()
+        if not body.get("username") or not body.get("password"):
+            return web.json_response({"meta": {"rc": "error"}}, status=400)
+        token = secrets.token_hex(16)
+        ttl = self.config.session_ttl
+        self.sessions[token] = time.monotonic() + ttl if ttl else None
+        resp = web.json_response({"meta": {"rc": "ok"}, "data": []})
+        resp.set_cookie(self.cookie_name, token)
+        if self.config.unifi_os:
+            resp.headers["X-CSRF-Token"] = self.csrf_token
+        return resp
+
+    def _site(self, request: web.Request) -> FakeSite | None:
+        """Return the site named in the request path."""
+        return self.sites.get(request.match_info["site"])
+
+    @staticmethod
+    def _no_site() -> web.Response:
+        """Answer a request for an unknown site."""
+        return web.json_response(
+            {"meta": {"rc": "error", "msg": "api.err.NoSiteContext"}}, status=400
+        )
+
+    async def sites_handler(self, request: web.Request) -> web.Response:
+        """Serve the account's site list."""
+        if (error := await self._guard(request)) is not None:
+            return error
+        return web.json_response(
+            envelope(
+                [
+                    {"_id": f"s{index:04d}", "name": site.name, "desc": site.desc}
+                    for index, site in enumerate(self.sites.values())
+                ]
+            )
+        )
+
+    async def devices_handler(self, request: web.Request) -> web.Response:
+        """Serve stat/device, honouring the optional macs filter."""
+        if (error := await self._guard(request)) is not None:
+            return error
+        if (site := self._site(request)) is None:
+            return self._no_site()
+        self.stats["device_requests"] += 1
+        self._advance_counters(site)
+        devices = site.devices
+        if request.method == "POST":
+            macs = set((await request.json()).get("macs", []))
+            devices = [device for device in devices if device["mac"] in macs]
+        self.stats["device_bytes"] += len(body := json.dumps(envelope(devices)))
+        response = web.Response(text=body, content_type="application/json")
+        # gzip or deflate, if the client asked for it
+        response.enable_compression()
+        return response
+
+    async def report_handler(self, request: web.Request) -> web.Response:
+        """Serve hourly gateway reports with synthetic traffic and latency."""
+        if (error := await self._guard(request)) is not None:
+            return error
+        if (site := self._site(request)) is None:
+            return self._no_site()
+        query = await request.json()
+        mac = query.get("mac")
+        if mac is not None and mac not in {gateway["mac"] for gateway in site.gateways}:
+            return web.json_response(envelope([]))
+        attrs = [attr for attr in query.get("attrs", []) if attr != "time"]
+        hour = 3_600_000
+        rows = []
+        for time_ms in range(-(-query["start"] // hour) * hour, query["end"], hour):
+            # Same values for the same hour, however often it is requested
+            rng = random.Random(f"{mac}{time_ms}")
+            row: dict[str, Any] = {"time": time_ms, "gw": mac}
+            for attr in attrs:
+                if attr.endswith("_bytes"):
+                    row[attr] = rng.randrange(10**7, 10**10)
+                elif attr.endswith("latency"):
+                    row[attr] = rng.randrange(3, 80)
+            rows.append(row)
+        self.stats["reports"] += 1
+        return web.json_response(envelope(rows))
+
+    async def health_handler(self, request: web.Request) -> web.Response:
+        """Serve stat/health, following the gateways' current WAN states."""
+        if (error := await self._guard(request)) is not None:
+            return error
+        if (site := self._site(request)) is None:
+            return self._no_site()
+        self.stats["health_requests"] += 1
+        return web.json_response(
+            envelope(make_health(site.isp_name, site.gateways))
+        )
+
+    async def events(self, request: web.Request) -> web.StreamResponse:
+        """Serve the site event websocket."""
+        if not self.authorized(request):
+            self.stats["401"] += 1
+            return web.Response(status=401)
+        if (site := self._site(request)) is None:
+            return self._no_site()
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        site.websockets.add(ws)
+        _LOGGER.info("Websocket client connected to %s", site.name)
+        try:
+            async for msg in ws:
+                if msg.type == WSMsgType.ERROR:
+                    break
+        finally:
+            site.websockets.discard(ws)
+        return ws
+
+    def _advance_counters(self, site: FakeSite) -> None:
+        """Let traffic flow on every WAN of the site that is up."""
+        if time.monotonic() - site.stats_at < self.config.stats_interval:
+            return
+        site.stats_at = time.monotonic()
+        now = int(time.time())
+        for gateway in site.gateways:
+            gateway["last_seen"] = now
+            for key, wan in gateway.items():
+                if key.startswith("wan") and isinstance(wan, dict) and wan["up"]:
+                    wan["rx_bytes"] += self.rng.randrange(10**5, 10**7)
+                    wan["tx_bytes"] += self.rng.randrange(10**4, 10**6)
+                    wan["rx_packets"] += self.rng.randrange(100, 10**4)
+                    wan["tx_packets"] += self.rng.randrange(100, 10**4)
+
+    async def set_wan(
+        self, gateway: int, wan: str, up: bool, site: str = "default"
+    ) -> None:
+        """Set a WAN up or down and push the change."""
+        device = self.sites[site].gateways[gateway]
+        device[wan]["up"] = up
+        device[wan]["uptime"] = 0 if not up else device[wan]["uptime"]
+        _LOGGER.info(
+            "%s %s %s is now %s", site, device["name"], wan, "up" if up else "down"
+        )
+        await self.broadcast(
+            {"meta": {"rc": "ok", "message": "device:sync"}, "data": [device]}, site
+        )
+
+    async def flap(self, interval: float) -> None:
+        """Toggle the first gateway's last WAN every interval seconds."""
+        wan = f"wan{self.config.wans}"
+        while True:
+            await asyncio.sleep(interval)
+            await self.set_wan(0, wan, not self.gateway[wan]["up"])
+
+    async def run_script(self) -> None:
+        """Play the scripted WAN state changes."""
+        for step in self.config.script:
+            await asyncio.sleep(step.get("after", 0))
+            await self.set_wan(
+                step.get("gateway", 0),
+                step["wan"],
+                step["up"],
+                step.get("site", "default"),
+            )
+
+    async def broadcast(self, message: dict[str, Any], site: str = "default") -> None:
+        """Send a message to every websocket connected to the site."""
+        for ws in list(self.sites[site].websockets):
+            await ws.send_json(message)
+
+
+def build_app(controller: FakeController) -> web.Application:
+    """Return the aiohttp application serving the controller endpoints."""
+    prefix = UNIFI_OS_PREFIX if controller.config.unifi_os else ""
+    login_path = "/api/auth/login" if controller.config.unifi_os else "/api/login"
+    app = web.Application()
+    app.router.add_get("/", controller.index)
+    app.router.add_post(login_path, controller.login)
+    app.router.add_get(f"{prefix}/api/self/sites", controller.sites_handler)
+    app.router.add_route(
+        "*", f"{prefix}/api/s/{{site}}/stat/device", controller.devices_handler
+    )
+    app.router.add_get(f"{prefix}/api/s/{{site}}/stat/health", controller.health_handler)
+    app.router.add_post(
+        f"{prefix}/api/s/{{site}}/stat/report/hourly.gw", controller.report_handler
+    )
+    app.router.add_get(f"{prefix}/wss/s/{{site}}/events", controller.events)
+    return app
+
+
+async def main() -> None:
+    """Run the fake controller until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8443)
+    parser.add_argument("--sites", type=int, default=1)
+    parser.add_argument("--devices", type=int, default=1, help="devices per site")
+    parser.add_argument("--gateways", type=int, default=1)
+    parser.add_argument("--wans", type=int, default=2, help="WANs per gateway")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument(
+        "--session-ttl", type=float, help="seconds before a login expires (401s)"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="fraction of 503 answers"
+    )
+    parser.add_argument(
+        "--stats-interval",
+        type=float,
+        default=0.0,
+        help="seconds between gateway stat updates (0: every request)",
+    )
+    parser.add_argument("--unifi-os", action="store_true")
+    parser.add_argument(
+        "--flap-interval",
+        type=float,
+        default=0.0,
+        help="seconds between state changes of the last WAN (0 disables)",
+    )
+    parser.add_argument("--script", type=Path, help="JSON list of WAN state steps")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    controller = FakeController(
+        FakeControllerConfig(
+            sites=args.sites,
+            devices=args.devices,
+            gateways=args.gateways,
+            wans=args.wans,
+            latency=args.latency,
+            latency_jitter=args.latency_jitter,
+            session_ttl=args.session_ttl,
+            error_rate=args.error_rate,
+            stats_interval=args.stats_interval,
+            unifi_os=args.unifi_os,
+            seed=args.seed,
+            script=json.loads(args.script.read_text()) if args.script else [],
+        )
+    )
+    runner = web.AppRunner(build_app(controller))
+    await runner.setup()
+    await web.TCPSite(runner, args.host, args.port).start()
+    _LOGGER.info("Fake controller listening on http://%s:%s", args.host, args.port)
+
+    tasks = [asyncio.create_task(controller.run_script())]
+    if args.flap_interval:
+        tasks.append(asyncio.create_task(controller.flap(args.flap_interval)))
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for task in tasks:
+            task.cancel()
+        _LOGGER.info("Served: %s", dict(controller.stats))
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
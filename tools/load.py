@@ -0,0 +1,166 @@
+"""Drive the integration's API client against the fake controller.
+
+Starts fake_controller.py in-process with the requested faults and runs
+concurrent pollers through UniFiClient for a fixed time, to exercise the
+re-login path, the retry on 401 and the request timeouts at high request
+rates:
+
+    python tools/load.py --pollers 20 --duration 30 \\
+        --session-ttl 5 --error-rate 0.05 --latency 0.05 --devices 500
+
+Prints the client side outcome (requests, errors by type, latency
+percentiles) next to what the controller served (logins, 401s, 503s).
+Requires Home Assistant to be installed, like the integration itself.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+from pathlib import Path
+import statistics
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from custom_components.unifi_wan_status.api import (  # noqa: E402
+    UniFiAuthError,
+    UniFiClient,
+    UniFiConnectionError,
+)
+from fake_controller import (  # noqa: E402
+    FakeController,
+    FakeControllerConfig,
+    build_app,
+)
+
+
+async def _poller(
+    client: UniFiClient,
+    deadline: float,
+    outcomes: Counter[str],
+    latencies: list[float],
+    site: str,
+    macs: list[str] | None,
+) -> None:
+    """Poll a site's devices and health like the coordinator until the deadline."""
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            await asyncio.gather(
+                client.get_devices(site, macs), client.get_health(site)
+            )
+        except UniFiAuthError:
+            outcomes["auth_error"] += 1
+        except UniFiConnectionError as err:
+            outcomes["timeout" if "Timeout" in repr(err.__cause__) else "error"] += 1
+        else:
+            outcomes["ok"] += 1
+        latencies.append(time.perf_counter() - start)
+
+
+def _percentile(values: list[float], percent: int) -> float:
+    """Return a percentile of values in milliseconds."""
+    if len(values) < 2:
+        return values[0] * 1000 if values else 0.0
+    return statistics.quantiles(values, n=100)[percent - 1] * 1000
+
+
+async def main() -> None:
+    """Run the load test and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=18443)
+    parser.add_argument("--pollers", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument(
+        "--shared-client",
+        action="store_true",
+        help="share one client (and login) between all pollers",
+    )
+    parser.add_argument(
+        "--targeted", action="store_true", help="poll gateways by MAC (POST)"
+    )
+    parser.add_argument(
+        "--sites", type=int, default=1, help="sites, spread over the pollers"
+    )
+    parser.add_argument("--devices", type=int, default=100)
+    parser.add_argument("--gateways", type=int, default=1)
+    parser.add_argument("--wans", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--session-ttl", type=float)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    controller = FakeController(
+        FakeControllerConfig(
+            sites=args.sites,
+            devices=args.devices,
+            gateways=args.gateways,
+            wans=args.wans,
+            latency=args.latency,
+            latency_jitter=args.latency_jitter,
+            session_ttl=args.session_ttl,
+            error_rate=args.error_rate,
+        )
+    )
+    runner = web.AppRunner(build_app(controller))
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", args.port).start()
+
+    url = f"http://127.0.0.1:{args.port}"
+    sites = list(controller.sites)
+    sessions: list[aiohttp.ClientSession] = []
+    clients: list[UniFiClient] = []
+    for _ in range(1 if args.shared_client else args.pollers):
+        session = aiohttp.ClientSession(cookie_jar=aiohttp.CookieJar(unsafe=True))
+        sessions.append(session)
+        clients.append(UniFiClient(session, url, "load", "test"))
+
+    outcomes: Counter[str] = Counter()
+    latencies: list[float] = []
+    deadline = time.monotonic() + args.duration
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(
+            *(
+                _poller(
+                    clients[index % len(clients)],
+                    deadline,
+                    outcomes,
+                    latencies,
+                    site := sites[index % len(sites)],
+                    [gateway["mac"] for gateway in controller.sites[site].gateways]
+                    if args.targeted
+                    else None,
+                )
+                for index in range(args.pollers)
+            )
+        )
+    finally:
+        elapsed = time.perf_counter() - started
+        for session in sessions:
+            await session.close()
+        await runner.cleanup()
+
+    polls = sum(outcomes.values())
+    print(
+        f"{polls} polls in {elapsed:.1f} s ({polls / elapsed:.0f}/s) by"
+        f" {args.pollers} pollers on {len(clients)} client(s)"
+    )
+    print(f"client:     {dict(outcomes)}")
+    print(
+        f"latency:    p50 {_percentile(latencies, 50):.1f} ms"
+        f"  p95 {_percentile(latencies, 95):.1f} ms"
+        f"  p99 {_percentile(latencies, 99):.1f} ms"
+    )
+    print(f"controller: {dict(controller.stats)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,223 @@
+"""Synthetic UniFi Controller payloads.
+
+Builds stat/device and stat/health answers shaped like a real site: a few
+gateways with one or more WAN interfaces, plus access points and switches
+carrying the radio and port tables that make large sites heavy. Output is
+deterministic for a given seed so benchmark runs are comparable.
+"""
+from __future__ import annotations
+
+import random
+from typing import Any
+
+
+def _mac(rng: random.Random, prefix: str) -> str:
+    """Return a random MAC address under a fixed prefix."""
+    return prefix + ":".join(f"{rng.randrange(256):02x}" for _ in range(3))
+
+
+def make_wan(rng: random.Random, index: int, up: bool = True) -> dict[str, Any]:
+    """Return a gateway WAN sub-object."""
+    return {
+        "up": up,
+        "enable": True,
+        "name": f"wan{index}",
+        "ifname": f"eth{8 + index}",
+        "ip": f"203.0.{113 + index}.{rng.randrange(2, 250)}",
+        "gateway": f"203.0.{113 + index}.1",
+        "netmask": "255.255.255.0",
+        "dns": ["1.1.1.1", "8.8.8.8"],
+        "type": rng.choice(["dhcp", "pppoe", "static"]),
+        "speed": rng.choice([100, 1000, 2500]),
+        "max_speed": 2500,
+        "full_duplex": True,
+        "rx_bytes": rng.randrange(10**9, 10**13),
+        "tx_bytes": rng.randrange(10**9, 10**12),
+        "rx_packets": rng.randrange(10**6, 10**10),
+        "tx_packets": rng.randrange(10**6, 10**10),
+        "rx_errors": 0,
+        "tx_errors": 0,
+        "rx_dropped": rng.randrange(100),
+        "tx_dropped": 0,
+        "uptime": rng.randrange(60, 90 * 86400),
+        "latency": rng.randrange(3, 80),
+        "mac": _mac(rng, "f0:9f:c2:"),
+    }
+
+
+def make_gateway(rng: random.Random, index: int, wans: int) -> dict[str, Any]:
+    """Return a gateway device with the given number of WAN interfaces."""
+    device: dict[str, Any] = {
+        "_id": f"gw{index:04d}",
+        "mac": _mac(rng, "f0:9f:c2:"),
+        "name": f"Gateway {index}",
+        "model": "UXGPRO",
+        "type": "uxg",
+        "state": 1,
+        "adopted": True,
+        "last_seen": 1_700_000_000 + index,
+        "uptime": rng.randrange(86400, 90 * 86400),
+        "system-stats": {"cpu": "7.1", "mem": "41.0", "uptime": "123456"},
+        "port_table": [_port(rng, port) for port in range(1, 5)],
+    }
+    for wan in range(1, wans + 1):
+        device[f"wan{wan}"] = make_wan(rng, wan)
+    return device
+
+
+def _port(rng: random.Random, index: int) -> dict[str, Any]:
+    """Return a switch/gateway port entry."""
+    return {
+        "port_idx": index,
+        "name": f"Port {index}",
+        "up": rng.random() > 0.3,
+        "speed": rng.choice([10, 100, 1000]),
+        "full_duplex": True,
+        "poe_enable": rng.random() > 0.5,
+        "poe_power": f"{rng.uniform(0, 15):.2f}",
+        "rx_bytes": rng.randrange(10**12),
+        "tx_bytes": rng.randrange(10**12),
+        "rx_packets": rng.randrange(10**9),
+        "tx_packets": rng.randrange(10**9),
+        "stp_state": "forwarding",
+        "mac_table": [
+            {"mac": _mac(rng, "00:11:22:"), "vlan": 1, "age": rng.randrange(300)}
+            for _ in range(rng.randrange(4))
+        ],
+    }
+
+
+def _radio(rng: random.Random, band: str) -> dict[str, Any]:
+    """Return an access point radio entry."""
+    return {
+        "name": f"wifi{band}",
+        "radio": band,
+        "channel": rng.randrange(1, 165),
+        "tx_power": rng.randrange(3, 24),
+        "num_sta": rng.randrange(40),
+        "cu_total": rng.randrange(100),
+        "satisfaction": rng.randrange(50, 100),
+        "tx_retries": rng.randrange(10**6),
+        "tx_packets": rng.randrange(10**9),
+    }
+
+
+def make_access_point(rng: random.Random, index: int) -> dict[str, Any]:
+    """Return an access point device."""
+    return {
+        "_id": f"ap{index:05d}",
+        "mac": _mac(rng, "78:8a:20:"),
+        "name": f"AP {index}",
+        "model": "U6LR",
+        "type": "uap",
+        "state": 1,
+        "adopted": True,
+        "last_seen": 1_700_000_000 + index,
+        "uptime": rng.randrange(86400, 90 * 86400),
+        "radio_table_stats": [_radio(rng, "ng"), _radio(rng, "na")],
+        "vap_table": [
+            {
+                "essid": f"SSID {vap}",
+                "bssid": _mac(rng, "7a:8a:20:"),
+                "num_sta": rng.randrange(30),
+                "rx_bytes": rng.randrange(10**11),
+                "tx_bytes": rng.randrange(10**11),
+            }
+            for vap in range(4)
+        ],
+        "uplink": {"type": "wire", "speed": 1000, "full_duplex": True},
+        "system-stats": {"cpu": "3.0", "mem": "55.0"},
+    }
+
+
+def make_switch(rng: random.Random, index: int) -> dict[str, Any]:
+    """Return a switch device with a 24 or 48 port table."""
+    return {
+        "_id": f"sw{index:05d}",
+        "mac": _mac(rng, "74:ac:b9:"),
+        "name": f"Switch {index}",
+        "model": "USW48P",
+        "type": "usw",
+        "state": 1,
+        "adopted": True,
+        "last_seen": 1_700_000_000 + index,
+        "uptime": rng.randrange(86400, 90 * 86400),
+        "port_table": [
+            _port(rng, port) for port in range(1, rng.choice([24, 48]) + 1)
+        ],
+        "system-stats": {"cpu": "12.0", "mem": "30.0"},
+    }
+
+
+def make_devices(
+    devices: int, gateways: int = 1, wans_per_gateway: int = 2, seed: int = 0
+) -> list[dict[str, Any]]:
+    """Return a stat/device list with devices entries in total.
+
+    Non-gateway devices are split between access points (3 in 4) and
+    switches, and shuffled so gateways are not conveniently first.
+    """
+    rng = random.Random(seed)
+    result = [make_gateway(rng, index, wans_per_gateway) for index in range(gateways)]
+    for index in range(max(devices - gateways, 0)):
+        if index % 4 == 3:
+            result.append(make_switch(rng, index))
+        else:
+            result.append(make_access_point(rng, index))
+    rng.shuffle(result)
+    return result
+
+
+def make_health(
+    isp_name: str = "Example ISP", gateways: list[dict[str, Any]] | None = None
+) -> list[dict[str, Any]]:
+    """Return a stat/health list.
+
+    With gateways, the wan and www subsystems follow their WAN states the
+    way a controller's do: the active WAN's IP, an alerting monitor per
+    WAN that is down (uptime_stats is keyed WAN, WAN2, ...) and an error
+    status once no WAN is up.
+    """
+    wans = [
+        (key, wan)
+        for gateway in gateways or []
+        for key, wan in gateway.items()
+        if key.startswith("wan") and isinstance(wan, dict)
+    ]
+    active = next((wan for _, wan in wans if wan["up"]), None)
+    status = "ok" if active is not None or not wans else "error"
+    wan_subsystem: dict[str, Any] = {
+        "subsystem": "wan",
+        "status": status,
+        "num_gw": len(gateways) if gateways else 1,
+        "isp_name": isp_name,
+        "isp_organization": f"{isp_name} Inc.",
+    }
+    if gateways:
+        wan_subsystem["gw_mac"] = gateways[0]["mac"]
+        wan_subsystem["num_disconnected"] = 0
+        wan_subsystem["wan_ip"] = active["ip"] if active is not None else None
+        wan_subsystem["uptime_stats"] = {
+            ("WAN" if key == "wan1" else key.upper()): {
+                "availability": 100.0 if wan["up"] else 0.0,
+                "latency_average": wan.get("latency", 0),
+                "alerting_monitors": [] if wan["up"] else [{"type": "icmp"}],
+                "time_period": 86400,
+            }
+            for key, wan in wans
+        }
+    return [
+        wan_subsystem,
+        {"subsystem": "lan", "status": "ok", "num_sw": 1},
+        {"subsystem": "wlan", "status": "ok", "num_ap": 1},
+        {
+            "subsystem": "www",
+            "status": status,
+            "latency": active.get("latency", 12) if active is not None else 0,
+        },
+    ]
+
+
+def envelope(data: list[dict[str, Any]]) -> dict[str, Any]:
+    """Wrap data the way the controller API does."""
+    return {"meta": {"rc": "ok"}, "data": data}